@@ -1,10 +1,110 @@
 import os
+import traceback
+import uuid
+import functools
 import threading
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from config import DOWNLOADS_DIR, OUTPUTS_DIR
-from pipeline import create_job, run_download_phase, run_analysis_phase, get_job
+import queue
+from urllib.parse import urlparse
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+from config import DOWNLOADS_DIR, OUTPUTS_DIR, USE_X_SENDFILE
+from pipeline import create_job, run_download_phase, run_analysis_phase, get_job, update_job
+import video_editor
 
 app = Flask(__name__)
+app.config["USE_X_SENDFILE"] = USE_X_SENDFILE
+
+# Background pipeline phases run on a fixed pool of daemon workers instead of
+# one fresh thread per request, so a burst of submissions queues up rather
+# than spawning unbounded threads. Daemon workers (like the per-request
+# threads they replace) never hold up Ctrl+C or a debug-reloader restart.
+JOB_WORKERS = 4
+_job_queue: queue.Queue = queue.Queue()
+
+
+def _job_worker() -> None:
+    while True:
+        phase, job_id = _job_queue.get()
+        try:
+            _run_phase(phase, job_id)
+        except Exception:
+            traceback.print_exc()
+
+
+for _i in range(JOB_WORKERS):
+    threading.Thread(target=_job_worker, name=f"job-{_i}", daemon=True).start()
+
+# Job ids whose phase is submitted but still waiting for a worker, in the
+# queue's FIFO order, so each one's queue position can be kept current
+_waiting_jobs: list[str] = []
+_running_phases = 0
+_phases_lock = threading.Lock()
+
+
+def _set_queue_position(job_id: str, ahead: int) -> None:
+    """Caller holds _phases_lock, so a job that already started is never marked queued."""
+    job = get_job(job_id)
+    if job is not None:
+        waiting = f"{ahead} job(s) ahead" if ahead else "next in line"
+        update_job(job, queued_ahead=ahead, message=f"Queued — {waiting}...")
+
+
+def _run_phase(phase, job_id: str) -> None:
+    global _running_phases
+    # A worker picked this job up: every job still waiting moves up one place
+    with _phases_lock:
+        _waiting_jobs.remove(job_id)
+        _running_phases += 1
+        job = get_job(job_id)
+        if job is not None:
+            job["queued_ahead"] = 0
+        for ahead, waiting_id in enumerate(_waiting_jobs):
+            _set_queue_position(waiting_id, ahead)
+    try:
+        phase(job_id)
+    finally:
+        with _phases_lock:
+            _running_phases -= 1
+
+
+def _submit_phase(phase, job_id: str) -> None:
+    """
+    Queue a pipeline phase for the job workers. If every worker is busy, the job
+    reports how many phases are waiting ahead of it until a worker picks it up.
+    """
+    with _phases_lock:
+        ahead = len(_waiting_jobs)
+        # No free worker once the running and already-waiting phases fill the pool
+        queued = _running_phases + ahead >= JOB_WORKERS
+        _waiting_jobs.append(job_id)
+        if queued:
+            _set_queue_position(job_id, ahead)
+    _job_queue.put((phase, job_id))
+
+
+@functools.lru_cache(maxsize=None)
+def _error_body(message: str) -> bytes:
+    return app.json.dumps({"error": message}).encode("utf-8")
+
+
+def _error(message: str, status: int) -> Response:
+    """JSON error response. Each fixed message is serialized only once."""
+    return Response(_error_body(message), status=status, mimetype="application/json")
+
+
+_YOUTUBE_HOSTS = frozenset({
+    "youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be",
+})
+
+
+def _is_youtube_url(url: str) -> bool:
+    """True if the URL's host is a YouTube domain (scheme optional)."""
+    if "://" not in url:
+        url = "https://" + url
+    try:
+        host = urlparse(url).hostname
+    except ValueError:
+        return False
+    return host in _YOUTUBE_HOSTS
 
 
 @app.route("/")
@@ -19,32 +119,40 @@ def process_video():
     url = data.get("url", "").strip()
 
     if not url:
-        return jsonify({"error": "Please provide a YouTube URL."}), 400
+        return _error("Please provide a YouTube URL.", 400)
 
-    if "youtube.com" not in url and "youtu.be" not in url:
-        return jsonify({"error": "Please provide a valid YouTube URL."}), 400
+    if not _is_youtube_url(url):
+        return _error("Please provide a valid YouTube URL.", 400)
 
     # Create job and run Phase 1 in background
     job_id = create_job(url)
-    thread = threading.Thread(target=run_download_phase, args=(job_id,), daemon=True)
-    thread.start()
+    _submit_phase(run_download_phase, job_id)
 
     return jsonify({"job_id": job_id})
 
 
-@app.route("/api/status/<job_id>")
-def job_status(job_id):
-    job = get_job(job_id)
-    if not job:
-        return jsonify({"error": "Job not found."}), 404
-
-    return jsonify({
-        "status": job["status"],
-        "progress": job["progress"],
-        "message": job["message"],
-        "video_title": job.get("video_title", ""),
-        "duration": job.get("duration", 0),
-        "clips": [
+def _status_fingerprint(job: dict) -> tuple:
+    """Everything the status payload depends on. Clips are only ever appended."""
+    return (
+        job["status"],
+        job["progress"],
+        job["message"],
+        job.get("video_title", ""),
+        job.get("duration", 0),
+        job.get("queued_ahead", 0),
+        len(job.get("clips", [])),
+    )
+
+
+def _clip_payloads(job: dict) -> list[dict]:
+    """
+    Public per-clip dicts for the status payload. Clips are append-only, so
+    each one is converted once and the list is only extended afterwards.
+    """
+    clips = job.get("clips", [])
+    payloads = job.get("_clip_payloads", [])
+    if len(payloads) < len(clips):
+        payloads = payloads + [
             {
                 "title": c.get("title", "Untitled"),
                 "hook": c.get("hook", ""),
@@ -54,11 +162,38 @@ def job_status(job_id):
                 "start": c.get("start", 0),
                 "end": c.get("end", 0),
                 "segments": c.get("segments", []),
-                "segment_count": len(c.get("segments", [])),
+                "segment_count": c.get("segment_count", len(c.get("segments", []))),
             }
-            for c in job.get("clips", [])
-        ],
+            for c in clips[len(payloads):]
+        ]
+        job["_clip_payloads"] = payloads
+    return payloads
+
+
+@app.route("/api/status/<job_id>")
+def job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return _error("Job not found.", 404)
+
+    # The UI polls this endpoint constantly but the payload only changes on
+    # state transitions, so reuse the serialized body until it does.
+    fingerprint = _status_fingerprint(job)
+    cached = job.get("_status_cache")
+    if cached and cached[0] == fingerprint:
+        return Response(cached[1], mimetype="application/json")
+
+    body = app.json.dumps({
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "video_title": job.get("video_title", ""),
+        "duration": job.get("duration", 0),
+        "queued_ahead": job.get("queued_ahead", 0),
+        "clips": _clip_payloads(job),
     })
+    job["_status_cache"] = (fingerprint, body)
+    return Response(body, mimetype="application/json")
 
 
 @app.route("/api/preview/<job_id>")
@@ -66,11 +201,11 @@ def preview_video(job_id):
     """Serve the downloaded video file for the preview player."""
     job = get_job(job_id)
     if not job:
-        return jsonify({"error": "Job not found."}), 404
+        return _error("Job not found.", 404)
 
     video_path = job.get("video_path")
     if not video_path or not os.path.exists(video_path):
-        return jsonify({"error": "Video file not found."}), 404
+        return _error("Video file not found.", 404)
 
     directory = os.path.dirname(video_path)
     filename = os.path.basename(video_path)
@@ -82,7 +217,7 @@ def get_transcript(job_id):
     """Return the parsed transcript segments as JSON."""
     job = get_job(job_id)
     if not job:
-        return jsonify({"error": "Job not found."}), 404
+        return _error("Job not found.", 404)
 
     segments = job.get("transcript_segments", [])
     return jsonify({
@@ -103,18 +238,15 @@ def continue_processing(job_id):
     """User approved — start Phase 2 (AI analysis + cutting)."""
     job = get_job(job_id)
     if not job:
-        return jsonify({"error": "Job not found."}), 404
+        return _error("Job not found.", 404)
 
     if job["status"] != "review":
-        return jsonify({"error": "Job is not in review stage."}), 400
+        return _error("Job is not in review stage.", 400)
 
     # Mark as continuing and run Phase 2 in background
-    job["status"] = "analyzing"
-    job["progress"] = 50
-    job["message"] = "Starting AI analysis..."
+    update_job(job, status="analyzing", progress=50, message="Starting AI analysis...")
 
-    thread = threading.Thread(target=run_analysis_phase, args=(job_id,), daemon=True)
-    thread.start()
+    _submit_phase(run_analysis_phase, job_id)
 
     return jsonify({"ok": True})
 
@@ -125,36 +257,46 @@ def download_clip(job_id, filename):
     as_attachment = request.args.get("dl") == "1"
     clip_dir = os.path.join(OUTPUTS_DIR, job_id)
     if not os.path.isdir(clip_dir):
-        return jsonify({"error": "Job not found."}), 404
+        return _error("Job not found.", 404)
     return send_from_directory(clip_dir, filename, as_attachment=as_attachment)
 
 
 # ==============================================================================
 # Editor & Subtitle Routes (Merged from Subtitle_gen)
 # ==============================================================================
-import video_editor
+
+# transcriber pulls in torch + whisper, so load it on first use rather than
+# stalling app startup.
+_transcriber = None
+
+
+def _get_transcriber():
+    global _transcriber
+    if _transcriber is None:
+        import transcriber
+        _transcriber = transcriber
+    return _transcriber
+
 
 @app.route("/editor/<job_id>/<filename>")
 def editor_view(job_id, filename):
     """Serve the React Vite editor."""
     return send_from_directory("static/react_editor", "index.html")
 
-import transcriber
-
 @app.route("/api/transcribe_clip/<job_id>/<filename>")
 def transcribe_clip(job_id, filename):
     """Dynamically transcribes the cut clip for the editor UI using Whisper/Hinglish Apex."""
     job = get_job(job_id)
     if not job:
-        return jsonify({"error": "Job not found."}), 404
+        return _error("Job not found.", 404)
         
     clip_path = os.path.join(OUTPUTS_DIR, job_id, filename)
     if not os.path.exists(clip_path):
-         return jsonify({"error": "Clip not found."}), 404
+         return _error("Clip not found.", 404)
          
     try:
         # Heavily process the video dynamically on-demand
-        result = transcriber.transcribe_video(clip_path, model_size="medium")
+        result = _get_transcriber().transcribe_video(clip_path, model_size="medium")
         
         # We can also update the job's memory to cache this if the user refreshes
         for c in job.get("clips", []):
@@ -168,7 +310,6 @@ def transcribe_clip(job_id, filename):
              "language": result.get("language", "en")
         })
     except Exception as e:
-        import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
@@ -181,15 +322,14 @@ def burn_video():
     video_format = data.get("format", "mp4")
     
     if not job_id or not filename or not segments:
-        return jsonify({"error": "Job ID, Filename, and segments required"}), 400
+        return _error("Job ID, Filename, and segments required", 400)
 
     input_path = os.path.join(OUTPUTS_DIR, job_id, filename)
     if not os.path.exists(input_path):
-        return jsonify({"error": "Input file not found"}), 404
+        return _error("Input file not found", 404)
         
     # Generate unique output name
     base_name = os.path.splitext(filename)[0]
-    import uuid
     unique_suffix = str(uuid.uuid4())[:8]
     output_filename = f"custom_sub_{base_name}_{unique_suffix}.{video_format}"
     output_path = os.path.join(OUTPUTS_DIR, job_id, output_filename)
@@ -208,7 +348,7 @@ def burn_video():
             "download_url": f"/api/download/{job_id}/{output_filename}"
         })
     else:
-        return jsonify({"error": "Failed to burn subtitles"}), 500
+        return _error("Failed to burn subtitles", 500)
 
 @app.route("/save_srt", methods=["POST"])
 def save_srt():
@@ -218,7 +358,7 @@ def save_srt():
     segments = data.get("segments")
     
     if not job_id or not filename or not segments:
-        return jsonify({"error": "Job ID, Filename, and segments required"}), 400
+        return _error("Job ID, Filename, and segments required", 400)
 
     base_name = os.path.splitext(filename)[0]
     srt_filename = f"{base_name}.srt"
@@ -241,11 +381,11 @@ def export_soft_subs():
     segments = data.get("segments")
     
     if not job_id or not filename or not segments:
-        return jsonify({"error": "Job ID, Filename, and segments required"}), 400
+        return _error("Job ID, Filename, and segments required", 400)
 
     input_path = os.path.join(OUTPUTS_DIR, job_id, filename)
     if not os.path.exists(input_path):
-        return jsonify({"error": "Input file not found"}), 404
+        return _error("Input file not found", 404)
 
     base_name = os.path.splitext(filename)[0]
     srt_filename = f"{base_name}.srt"
@@ -264,7 +404,7 @@ def export_soft_subs():
             "download_url": f"/api/download/{job_id}/{output_filename}"
         })
     else:
-        return jsonify({"error": "Failed to export soft subtitles"}), 500
+        return _error("Failed to export soft subtitles", 500)
 
 
 if __name__ == "__main__":
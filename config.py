@@ -6,6 +6,17 @@ load_dotenv()
 # ── API ──────────────────────────────────────────────
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 
+# ── Server ───────────────────────────────────────────
+# Let a front proxy (Apache mod_xsendfile, lighttpd, ...) stream preview and
+# clip files instead of Python. Only enable behind a proxy that handles it.
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
+# Use NVENC/QSV for clip encodes when a working GPU encoder is found.
+# Set FFMPEG_HW_ENCODE=0 to force libx264.
+FFMPEG_HW_ENCODE = os.getenv("FFMPEG_HW_ENCODE", "1") != "0"
+# libx264 preset for clip encodes (CRF 18 already fixes the quality target)
+FFMPEG_PRESET = os.getenv("FFMPEG_PRESET", "veryfast")
+
 # ── Paths ────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DOWNLOADS_DIR = os.path.join(BASE_DIR, "downloads")
@@ -22,3 +33,6 @@ MAX_CLIP_DURATION = 150  # seconds (total short duration, up to 2.5 min)
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "minimax/minimax-m2.5:free")
 CHUNK_MINUTES = 30       # minutes per transcript chunk for long videos
 MAX_RETRIES = 3          # retries for API calls
+# Reuse a chunk's clips when the exact same prompt was answered this recently
+# (seconds). 0 disables the cache so every run asks the model again.
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
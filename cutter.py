@@ -1,14 +1,34 @@
 import os
+import json
 import subprocess
-import shutil
 import re
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import FFMPEG_HW_ENCODE, FFMPEG_PRESET
+
+# libx264 is already multi-threaded, so only run a few encodes side by side
+MAX_PARALLEL_CUTS = max(1, (os.cpu_count() or 1) // 4)
+
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s-]')
 
 
 def _sanitize_filename(name: str) -> str:
     """Remove special characters to make a safe filename."""
-    safe = re.sub(r'[^\w\s-]', '', name)
-    safe = re.sub(r'\s+', ' ', safe).strip()
-    return safe.replace(' ', '_')
+    safe = _UNSAFE_FILENAME_CHARS.sub('', name)
+    # split() collapses whitespace runs and trims the ends in one go
+    return '_'.join(safe.split())
+
+
+def _file_size(path: str) -> int:
+    """Size of `path` in bytes (0 if missing) with a single stat() call."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
 
 
 def cut_clips(
@@ -30,48 +50,129 @@ def cut_clips(
         clips list with added 'output_path' and 'filename' keys
     """
     os.makedirs(output_dir, exist_ok=True)
-    results = []
+    if not clips:
+        return []
+
+    workers = min(len(clips), MAX_PARALLEL_CUTS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_process_clip, video_path, clip, output_dir, i)
+            for i, clip in enumerate(clips, 1)
+        ]
+        results = [f.result() for f in futures]
 
-    for i, clip in enumerate(clips, 1):
-        segments = clip.get("segments", [])
-        if not segments:
-            continue
+    # Keep the original clip order, dropping the ones that failed
+    return [r for r in results if r is not None]
 
-        raw_title = clip.get("title") or f"short_{i}"
-        if raw_title == "Untitled":
-            raw_title = f"short_{i}"
 
-        sanitized_title = _sanitize_filename(raw_title) or f"short_{i}"
+def _process_clip(
+    video_path: str,
+    clip: dict,
+    output_dir: str,
+    i: int,
+) -> dict | None:
+    """Cut a single clip (1-based index `i`). Returns the clip result or None."""
+    segments = clip.get("segments", [])
+    if not segments:
+        return None
 
-        # Write directly to output_dir instead of making a subfolder
-        video_filename = f"{sanitized_title}.mp4"
-        video_output_path = os.path.join(output_dir, video_filename)
+    raw_title = clip.get("title") or f"short_{i}"
+    if raw_title == "Untitled":
+        raw_title = f"short_{i}"
 
-        try:
-            if len(segments) == 1:
-                seg = segments[0]
-                success = _cut_single(video_path, seg, video_output_path)
-            else:
-                success = _cut_and_concat(
-                    video_path, segments, video_output_path, output_dir, i,
-                )
+    sanitized_title = _sanitize_filename(raw_title) or f"short_{i}"
+
+    # Write directly to output_dir instead of making a subfolder
+    video_filename = f"{sanitized_title}.mp4"
+    video_output_path = os.path.join(output_dir, video_filename)
+
+    try:
+        if len(segments) == 1:
+            seg = segments[0]
+            success = _cut_single(video_path, seg, video_output_path)
+        else:
+            success = _cut_and_concat(video_path, segments, video_output_path)
+
+        if success and _file_size(video_output_path) > 0:
+            clip_result = clip.copy()
+            clip_result["output_path"] = video_output_path
+            clip_result["filename"] = video_filename
+
+            seg_info = f"{len(segments)} segment(s)"
+            print(f"  ✓ Short {i}: {seg_info} → {video_filename}")
+            return clip_result
+
+        print(f"  ✗ Short {i}: failed to produce output")
+
+    except Exception as e:
+        print(f"  ✗ Short {i} error: {e}")
+
+    return None
 
-            if success and os.path.exists(video_output_path) and os.path.getsize(video_output_path) > 0:
-                clip_result = clip.copy()
-                clip_result["output_path"] = video_output_path
-                clip_result["filename"] = video_filename
-                results.append(clip_result)
 
-                seg_info = f"{len(segments)} segment(s)"
-                print(f"  ✓ Short {i}: {seg_info} → {video_filename}")
-            else:
-                print(f"  ✗ Short {i}: failed to produce output")
+# Common ffmpeg prefix: no banner/config dump on every start, never read
+# stdin (concurrent cuts would otherwise fight over the terminal), and only
+# log real errors so the captured stderr stays small on long encodes.
+_FFMPEG = ["ffmpeg", "-y", "-hide_banner", "-nostdin", "-loglevel", "error", "-nostats"]
 
-        except Exception as e:
-            print(f"  ✗ Short {i} error: {e}")
-            continue
 
-    return results
+# Kill an encode that has not produced a new frame for this many seconds
+FFMPEG_STALL_TIMEOUT = 30
+
+
+def _run_ffmpeg(cmd: list[str], timeout: float = 300) -> tuple[bool, str]:
+    """
+    Run an ffmpeg command, keeping only the last lines of its stderr.
+
+    ffmpeg reports its frame count on stdout (-progress pipe:1); if that stops
+    advancing for FFMPEG_STALL_TIMEOUT seconds the process is killed instead
+    of holding a worker until the hard timeout.
+    Returns (success, stderr_tail). Raises subprocess.TimeoutExpired.
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", *cmd[1:]]
+    tail: deque[bytes] = deque(maxlen=64)
+    last_progress = [time.monotonic()]
+
+    def watch_progress(stream):
+        last_frame = None
+        for line in stream:
+            if line.startswith(b"frame=") and line != last_frame:
+                last_frame = line
+                last_progress[0] = time.monotonic()
+
+    stalled = False
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        readers = [
+            threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True),
+            threading.Thread(target=watch_progress, args=(proc.stdout,), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                try:
+                    proc.wait(timeout=1)
+                    break
+                except subprocess.TimeoutExpired:
+                    now = time.monotonic()
+                    if now > deadline:
+                        proc.kill()
+                        raise subprocess.TimeoutExpired(cmd, timeout)
+                    if now - last_progress[0] > FFMPEG_STALL_TIMEOUT:
+                        proc.kill()
+                        proc.wait()
+                        stalled = True
+                        break
+        finally:
+            for reader in readers:
+                reader.join()
+
+    stderr_tail = b"".join(tail).decode(errors="ignore")
+    if stalled:
+        stderr_tail += f"\nffmpeg stalled: no progress for {FFMPEG_STALL_TIMEOUT}s"
+        return False, stderr_tail
+    return proc.returncode == 0, stderr_tail
 
 
 # ── Base video filter (scale + letterbox pad to 9:16) ─────────────────────────
@@ -82,6 +183,120 @@ _BASE_VF = (
 )
 
 
+# ── Video encoder selection ───────────────────────────────────────────────────
+
+# 128k AAC is transparent for speech-heavy shorts played on phones
+_AAC_ARGS = ("-c:a", "aac", "-b:a", "128k")
+
+# Each profile is (per-input decode args, encoder args).
+_X264_PROFILE = ((), ("-c:v", "libx264", "-preset", FFMPEG_PRESET, "-crf", "18"))
+
+# Hardware H.264 encoders that accept ordinary system-memory frames, in
+# preference order. VAAPI is left out: it needs a device + hwupload filter.
+# NVENC also decodes on the GPU (NVDEC); without -hwaccel_output_format the
+# frames come back to system memory for the scale/pad graph, and ffmpeg falls
+# back to software decoding for codecs the GPU cannot handle.
+# -b:v 0 is required for -cq to act as a pure quality target on NVENC.
+_HW_PROFILES = [
+    (
+        ("-hwaccel", "cuda"),
+        ("-c:v", "h264_nvenc", "-preset", "p3", "-tune", "hq", "-rc", "vbr",
+         "-cq", "19", "-b:v", "0", "-profile:v", "high"),
+    ),
+    ((), ("-c:v", "h264_qsv", "-preset", "faster", "-global_quality", "19")),
+]
+
+
+@functools.lru_cache(maxsize=1)
+def _encoder_profile() -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """
+    Pick the video encoder once per process.
+    ffmpeg builds often list nvenc/qsv without a usable GPU, so each candidate
+    is verified with a tiny test encode before it is trusted.
+    """
+    if FFMPEG_HW_ENCODE:
+        for input_args, codec_args in _HW_PROFILES:
+            probe = [
+                *_FFMPEG,
+                "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+                *codec_args,
+                "-f", "null", "-",
+            ]
+            try:
+                proc = subprocess.run(
+                    probe, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            if proc.returncode == 0:
+                print(f"  Using hardware encoder: {codec_args[1]}")
+                return input_args, codec_args
+
+    return _X264_PROFILE
+
+
+def _encode(build_cmd) -> tuple[bool, str]:
+    """
+    Run the ffmpeg command built by build_cmd(input_args, codec_args).
+    A hardware encoder that passed the startup probe can still fail on a real
+    source (driver reset, session limit, unsupported size), so a failed
+    hardware run is retried once with libx264 instead of dropping the clip.
+    """
+    profile = _encoder_profile()
+    success, stderr = _run_ffmpeg(build_cmd(*profile))
+    if not success and profile != _X264_PROFILE:
+        print(f"    ⟳ {profile[1][1]} encode failed, retrying with libx264")
+        success, stderr = _run_ffmpeg(build_cmd(*_X264_PROFILE))
+    return success, stderr
+
+
+# ── Source probing ────────────────────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=32)
+def _probe_video(video_path: str) -> dict:
+    """Codec names and video size of the source (empty dict if ffprobe fails)."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,width,height",
+        "-of", "json",
+        video_path,
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=30)
+        streams = json.loads(proc.stdout or b"{}").get("streams", [])
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return {}
+
+    info = {}
+    for stream in streams:
+        kind = stream.get("codec_type")
+        if kind == "video" and "vcodec" not in info:
+            info["vcodec"] = stream.get("codec_name")
+            info["width"] = stream.get("width")
+            info["height"] = stream.get("height")
+        elif kind == "audio" and "acodec" not in info:
+            info["acodec"] = stream.get("codec_name")
+    return info
+
+
+def _can_stream_copy(video_path: str) -> bool:
+    """True when the source is already 1080x1920 H.264/AAC, i.e. scale+pad would be a no-op."""
+    info = _probe_video(video_path)
+    return (
+        info.get("vcodec") == "h264"
+        and info.get("acodec") == "aac"
+        and info.get("width") == 1080
+        and info.get("height") == 1920
+    )
+
+
+def _audio_args(video_path: str) -> tuple[str, ...]:
+    """Copy the audio track when it is already AAC; transcode it otherwise."""
+    if _probe_video(video_path).get("acodec") == "aac":
+        return ("-c:a", "copy")
+    return _AAC_ARGS
+
+
 # ── Single-segment cut ─────────────────────────────────────────────────────────
 
 def _cut_single(
@@ -92,20 +307,38 @@ def _cut_single(
     """Cut, scale to 9:16 for a single segment. No subtitle burning."""
     duration = segment["end"] - segment["start"]
 
-    cmd = [
-        "ffmpeg", "-y",
-        "-ss", str(segment["start"]),
-        "-i", video_path,
-        "-t", str(duration),
-        "-vf", _BASE_VF,
-        "-c:v", "libx264", "-preset", "fast", "-crf", "18",
-        "-c:a", "aac", "-b:a", "192k",
-        "-movflags", "+faststart",
-        output_path,
-    ]
+    if _can_stream_copy(video_path):
+        # Already a 9:16 H.264/AAC source: copy the streams instead of
+        # re-encoding. The cut snaps to the keyframe before the start.
+        cmd = [
+            *_FFMPEG,
+            "-ss", str(segment["start"]),
+            "-i", video_path,
+            "-t", str(duration),
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            output_path,
+        ]
+        success, _ = _run_ffmpeg(cmd)
+        return success
+
+    def build_cmd(input_args, codec_args):
+        return [
+            *_FFMPEG,
+            *input_args,
+            "-ss", str(segment["start"]),
+            "-i", video_path,
+            "-t", str(duration),
+            "-vf", _BASE_VF,
+            *codec_args,
+            *_audio_args(video_path),
+            "-movflags", "+faststart",
+            output_path,
+        ]
 
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300)
-    return proc.returncode == 0
+    success, _ = _encode(build_cmd)
+    return success
 
 
 # ── Multi-segment cut + concat ────────────────────────────────────────────────
@@ -114,67 +347,56 @@ def _cut_and_concat(
     video_path: str,
     segments: list[dict],
     output_path: str,
-    output_dir: str,
-    clip_index: int,
 ) -> bool:
     """
     Cut multiple segments and concatenate them into one video.
     No subtitle burning — each segment is just scaled to 9:16.
-    """
-    temp_files = []
-    concat_list_path = os.path.join(output_dir, f"_concat_{clip_index}.txt")
-
-    try:
-        for j, seg in enumerate(segments):
-            temp_path = os.path.join(output_dir, f"_temp_{clip_index}_{j}.mp4")
-            temp_files.append(temp_path)
 
+    Everything happens in a single FFmpeg pass: every segment is opened as
+    its own seeked input and joined with the concat filter, so there are no
+    intermediate files and only one encode. The concat filter works on
+    decoded audio, so unlike _cut_single the audio is always re-encoded.
+    A source without an audio stream gets a video-only graph.
+    """
+    # An empty probe means ffprobe failed; assume audio rather than drop it
+    info = _probe_video(video_path)
+    has_audio = not info or bool(info.get("acodec"))
+    filters = []
+    concat_inputs = ""
+
+    for j in range(len(segments)):
+        filters.append(f"[{j}:v]{_BASE_VF},setpts=PTS-STARTPTS[v{j}]")
+        concat_inputs += f"[v{j}]"
+        if has_audio:
+            filters.append(f"[{j}:a]asetpts=PTS-STARTPTS[a{j}]")
+            concat_inputs += f"[a{j}]"
+
+    if has_audio:
+        filters.append(f"{concat_inputs}concat=n={len(segments)}:v=1:a=1[outv][outa]")
+        output_args = ("-map", "[outv]", "-map", "[outa]")
+        audio_args = _AAC_ARGS
+    else:
+        filters.append(f"{concat_inputs}concat=n={len(segments)}:v=1:a=0[outv]")
+        output_args = ("-map", "[outv]")
+        audio_args = ()
+
+    def build_cmd(input_args, codec_args):
+        cmd = list(_FFMPEG)
+        for seg in segments:
             seg_duration = seg["end"] - seg["start"]
-
-            cmd = [
-                "ffmpeg", "-y",
-                "-ss", str(seg["start"]),
-                "-i", video_path,
-                "-t", str(seg_duration),
-                "-vf", _BASE_VF,
-                "-c:v", "libx264", "-preset", "fast", "-crf", "18",
-                "-c:a", "aac", "-b:a", "192k",
-                "-movflags", "+faststart",
-                temp_path,
-            ]
-
-            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300)
-
-            if proc.returncode != 0:
-                print(f"    ✗ Segment {j+1} cut failed: {proc.stderr.decode(errors='ignore')[:200]}")
-                return False
-
-        # Write concat list
-        with open(concat_list_path, "w", encoding="utf-8") as f:
-            for temp_path in temp_files:
-                safe_path = temp_path.replace("\\", "/")
-                f.write(f"file '{safe_path}'\n")
-
-        # Stream-copy concat
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "concat", "-safe", "0",
-            "-i", concat_list_path,
-            "-c", "copy",
+            cmd += [*input_args, "-ss", str(seg["start"]), "-t", str(seg_duration), "-i", video_path]
+        return cmd + [
+            "-filter_complex", ";".join(filters),
+            *output_args,
+            *codec_args,
+            *audio_args,
             "-movflags", "+faststart",
             output_path,
         ]
 
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300)
-        if proc.returncode != 0:
-            print(f"    ✗ Concat failed: {proc.stderr.decode(errors='ignore')[:200]}")
-            return False
+    success, stderr = _encode(build_cmd)
+    if not success:
+        print(f"    ✗ Concat failed: {stderr[-300:]}")
+        return False
 
-        return True
-
-    finally:
-        for p in temp_files + [concat_list_path]:
-            try:
-                os.remove(p)
-            except OSError:
-                pass
+    return True
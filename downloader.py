@@ -1,9 +1,15 @@
 import os
-import glob
+import hashlib
 import json
+import re
+import shutil
 import time
 import subprocess
 import sys
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 
 # Use the venv's yt-dlp binary (not the outdated system-wide one)
 YTDLP_BIN = os.path.join(os.path.dirname(sys.executable), "yt-dlp.exe")
@@ -13,10 +19,19 @@ if not os.path.exists(YTDLP_BIN):
 # Languages to attempt for captions, in priority order
 SUBTITLE_LANGS = ["en", "hi", "en-US", "en-GB", "en-IN"]
 
+# Video container extensions yt-dlp may produce, in order of preference
+VIDEO_EXTS = (".mp4", ".webm", ".mkv", ".avi")
+
+# Parallel fragment fetches for DASH/HLS downloads
+CONCURRENT_FRAGMENTS = 8
+
 # Retry settings
 MAX_DOWNLOAD_RETRIES = 3
 RETRY_BACKOFF_BASE = 3  # seconds
 
+# Pause after YouTube answers a caption request with 429 before the next one
+CAPTION_RATE_LIMIT_WAIT = 5  # seconds
+
 # Format selection strategies — tried in order until one works.
 # This prevents "Requested format is not available" errors.
 FORMAT_STRATEGIES = [
@@ -37,38 +52,314 @@ if not os.path.isfile(COOKIES_FILE):
 # Browser cookie sources to try (in priority order)
 BROWSER_COOKIE_SOURCES = ["edge", "chrome", "firefox", "brave"]
 
+
+def _browser_profile_dirs(browser: str) -> list[str]:
+    """Where `browser` keeps its profiles (and so its cookie store) on this OS."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        local = os.environ.get("LOCALAPPDATA", os.path.join(home, "AppData", "Local"))
+        roaming = os.environ.get("APPDATA", os.path.join(home, "AppData", "Roaming"))
+        return {
+            "edge": [os.path.join(local, "Microsoft", "Edge", "User Data")],
+            "chrome": [os.path.join(local, "Google", "Chrome", "User Data")],
+            "brave": [os.path.join(local, "BraveSoftware", "Brave-Browser", "User Data")],
+            "firefox": [os.path.join(roaming, "Mozilla", "Firefox", "Profiles")],
+        }.get(browser, [])
+    if sys.platform == "darwin":
+        support = os.path.join(home, "Library", "Application Support")
+        return {
+            "edge": [os.path.join(support, "Microsoft Edge")],
+            "chrome": [os.path.join(support, "Google", "Chrome")],
+            "brave": [os.path.join(support, "BraveSoftware", "Brave-Browser")],
+            "firefox": [os.path.join(support, "Firefox", "Profiles")],
+        }.get(browser, [])
+    config = os.environ.get("XDG_CONFIG_HOME", os.path.join(home, ".config"))
+    return {
+        "edge": [os.path.join(config, "microsoft-edge")],
+        "chrome": [os.path.join(config, "google-chrome")],
+        "brave": [os.path.join(config, "BraveSoftware", "Brave-Browser")],
+        "firefox": [
+            os.path.join(home, ".mozilla", "firefox"),
+            os.path.join(home, "snap", "firefox", "common", ".mozilla", "firefox"),
+        ],
+    }.get(browser, [])
+
+
+# Browsers actually installed for this user, checked once at import so a
+# missing browser never costs a failed yt-dlp run per restricted video.
+AVAILABLE_BROWSERS = [
+    b for b in BROWSER_COOKIE_SOURCES
+    if any(os.path.isdir(d) for d in _browser_profile_dirs(b))
+]
+
 # Extra extractor arguments to help with age-restricted videos
 # Uses multiple player clients — some bypass restrictions that others don't.
 YTDLP_EXTRACTOR_ARGS = ["--extractor-args", "youtube:player_client=web,default"]
 
+# Pin yt-dlp's cache (extracted player signature functions etc.) to the
+# project so every run starts warm, whatever user/HOME the server runs as.
+YTDLP_CACHE_DIR = os.path.join(_BASE_DIR, ".ytdlp_cache")
+YTDLP_CACHE_ARGS = ["--cache-dir", YTDLP_CACHE_DIR]
+
+# yt-dlp prints titles and progress bars in UTF-8 when told to; decode them
+# the same way instead of the locale default (cp1252 on many Windows setups),
+# and never let an odd byte raise UnicodeDecodeError mid-job.
+_YTDLP_TEXT_IO = {
+    "encoding": "utf-8",
+    "errors": "replace",
+    "env": {**os.environ, "PYTHONIOENCODING": "utf-8", "PYTHONUTF8": "1"},
+}
+
+# yt-dlp error text → failure kinds, classified in a single regex scan
+_YTDLP_ERROR_RE = re.compile(
+    r"(?P<unavailable>Video unavailable|Private video)"
+    r"|(?P<bad_url>is not a valid URL|Unsupported URL)"
+    r"|(?P<auth>Sign in to confirm|age)"
+    r"|(?P<format>Requested format|format is not available)"
+    r"|(?P<images_only>Only images|no video formats)"
+    r"|(?P<cookie_access>Could not copy|locked|sqlite|Permission denied)",
+    re.IGNORECASE,
+)
+
+
+def _ytdlp_error_kinds(output: str) -> set[str]:
+    """Every failure kind (regex group name) present in yt-dlp output."""
+    return {m.lastgroup for m in _YTDLP_ERROR_RE.finditer(output)}
+
+
+# "[download]  42.3% of ..." progress lines (printed one per line with --newline)
+_YTDLP_PROGRESS_RE = re.compile(r"^\[download\]\s+(\d+(?:\.\d+)?)%")
+
+
+def _run_ytdlp_streaming(
+    cmd: list[str],
+    timeout: float,
+    on_progress: Callable[[float], None] | None = None,
+    abort_kinds: frozenset[str] = frozenset(),
+) -> tuple[int, str]:
+    """
+    Run yt-dlp, reading its output as it is produced instead of buffering all
+    of it. Download percentages go to `on_progress`; the process is stopped
+    as soon as a line shows one of `abort_kinds` (see _YTDLP_ERROR_RE).
+    Only the last lines are kept. Returns (returncode, output_tail).
+    Raises subprocess.TimeoutExpired.
+    """
+    tail: deque[str] = deque(maxlen=50)
+    with subprocess.Popen(
+        [*cmd, "--newline"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        **_YTDLP_TEXT_IO,
+        bufsize=1,
+    ) as proc:
+        def read_output():
+            for line in proc.stdout:
+                tail.append(line)
+                m = _YTDLP_PROGRESS_RE.match(line)
+                if m:
+                    if on_progress:
+                        on_progress(float(m.group(1)))
+                elif abort_kinds and not abort_kinds.isdisjoint(_ytdlp_error_kinds(line)):
+                    proc.terminate()
+
+        reader = threading.Thread(target=read_output, daemon=True)
+        reader.start()
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            raise
+        finally:
+            reader.join()
+    return proc.returncode, "".join(tail)
 
-def _find_file(directory: str, ext: str) -> str | None:
-    """Find the first file with given extension in a directory (case-insensitive)."""
-    ext_lower = ext.lower()
-    for f in os.listdir(directory):
-        if f.lower().endswith(ext_lower):
-            return os.path.join(directory, f)
-    return None
 
+# Metadata + captions from earlier jobs, so re-running a URL skips the info
+# fetch and caption download. Info holds signed format URLs that YouTube
+# expires after ~6h, so it is kept for a shorter time than captions.
+DOWNLOAD_CACHE_DIR = os.path.join(_BASE_DIR, ".download_cache")
+INFO_CACHE_TTL = 2 * 3600  # seconds
+CAPTION_CACHE_TTL = 24 * 3600
 
-def _find_srt_file(directory: str) -> str | None:
+
+def _find_first_by_exts(
+    directory: str, ext_priority: tuple[str, ...], min_size: int = 0
+) -> str | None:
     """
-    Find any SRT file in the directory.
-    yt-dlp can name subtitle files in many patterns, so we use glob.
+    Find a file by extension (case-insensitive) with a single directory scan.
+    Extensions are tried in priority order; the first match wins. Files
+    smaller than `min_size` bytes are skipped, using the scan's own stat.
     """
-    patterns = ["*.srt"]
-    for pattern in patterns:
-        matches = glob.glob(os.path.join(directory, pattern))
-        if matches:
-            return matches[0]
+    by_ext: dict[str, str] = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            name = entry.name.lower()
+            for ext in ext_priority:
+                if name.endswith(ext) and ext not in by_ext:
+                    if entry.stat().st_size >= min_size:
+                        by_ext[ext] = entry.path
+    for ext in ext_priority:
+        if ext in by_ext:
+            return by_ext[ext]
     return None
 
 
-def _get_video_info(url: str, auth_args: list[str] | None = None) -> dict:
+def _write_info_json(info: dict, output_dir: str, video_id: str) -> str | None:
+    """
+    Save a full --dump-json result so later yt-dlp runs can --load-info-json
+    it instead of re-fetching the watch page and re-running the extractor.
+    Partial info from _get_basic_video_info has no formats and is not saved.
+    """
+    if not info.get("formats"):
+        return None
+    path = os.path.join(output_dir, f"{video_id}.info.json")
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+    except OSError:
+        return None
+    return path
+
+
+def _source_args(url: str, info_json: str | None) -> list[str]:
+    """yt-dlp input: the cached info JSON when available, else the URL."""
+    if info_json:
+        return ["--load-info-json", info_json]
+    return [url]
+
+
+# ── Cross-job download cache ─────────────────────────────────────────────────
+
+def _cache_is_fresh(path: str, ttl: float) -> bool:
+    try:
+        return time.time() - os.stat(path).st_mtime < ttl
+    except OSError:
+        return False
+
+
+def _info_cache_path(url: str) -> str:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(DOWNLOAD_CACHE_DIR, f"{key}.info.json")
+
+
+def _load_cached_info(url: str) -> tuple[dict, list[str] | None] | None:
+    """(info, auth_args) from an earlier run of this URL, if still fresh."""
+    path = _info_cache_path(url)
+    if not _cache_is_fresh(path, INFO_CACHE_TTL):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        return cached["info"], cached["auth_args"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _store_cached_info(url: str, info: dict, auth_args: list[str] | None) -> None:
+    path = _info_cache_path(url)
+    try:
+        os.makedirs(DOWNLOAD_CACHE_DIR, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"info": info, "auth_args": auth_args}, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"  ✗ Could not cache video info: {e}")
+    _prune_download_cache()
+
+
+def _load_cached_captions(video_id: str, output_dir: str) -> str | None:
+    """Copy a fresh cached SRT for this video into output_dir and return its path."""
+    if not os.path.isdir(DOWNLOAD_CACHE_DIR):
+        return None
+    srt = _pick_srt_by_priority(DOWNLOAD_CACHE_DIR, video_id, fallback=False)
+    if not srt or not _cache_is_fresh(srt, CAPTION_CACHE_TTL):
+        return None
+    dest = os.path.join(output_dir, os.path.basename(srt))
+    try:
+        shutil.copyfile(srt, dest)
+    except OSError:
+        return None
+    return dest
+
+
+def _store_cached_captions(srt_path: str) -> None:
+    try:
+        os.makedirs(DOWNLOAD_CACHE_DIR, exist_ok=True)
+        shutil.copyfile(srt_path, os.path.join(DOWNLOAD_CACHE_DIR, os.path.basename(srt_path)))
+    except OSError as e:
+        print(f"  ✗ Could not cache captions: {e}")
+
+
+def _prune_download_cache() -> None:
+    """Drop cache entries past their TTL so the cache dir does not grow forever."""
+    try:
+        with os.scandir(DOWNLOAD_CACHE_DIR) as it:
+            for entry in it:
+                ttl = CAPTION_CACHE_TTL if entry.name.endswith(".srt") else INFO_CACHE_TTL
+                try:
+                    if time.time() - entry.stat().st_mtime > ttl:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
+class _ProbeCancelled(Exception):
+    """An info probe was stopped because a higher-priority auth strategy won."""
+
+
+def _run_probe(cmd: list[str], cancel: threading.Event | None, timeout: float) -> tuple[int, str, str]:
+    """
+    Run a yt-dlp probe and return (returncode, stdout, stderr). With a cancel
+    event the process is polled and killed once the event is set.
+    Raises subprocess.TimeoutExpired or _ProbeCancelled.
+    """
+    if cancel is None:
+        proc = subprocess.run(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, **_YTDLP_TEXT_IO,
+        )
+        return proc.returncode, proc.stdout, proc.stderr
+
+    deadline = time.monotonic() + timeout
+    with subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_YTDLP_TEXT_IO,
+    ) as proc:
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=0.5)
+                return proc.returncode, stdout, stderr
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    proc.kill()
+                    proc.communicate()
+                    raise _ProbeCancelled()
+                if time.monotonic() > deadline:
+                    proc.kill()
+                    proc.communicate()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+
+
+def _probe_backoff(seconds: float, cancel: threading.Event | None) -> None:
+    """Sleep before a probe retry, waking early with _ProbeCancelled if cancelled."""
+    if cancel is None:
+        time.sleep(seconds)
+    elif cancel.wait(seconds):
+        raise _ProbeCancelled()
+
+
+def _get_video_info(
+    url: str, auth_args: list[str] | None = None, cancel: threading.Event | None = None
+) -> dict:
     """
     Get video metadata without downloading. Retries on transient failure.
     auth_args: optional list of CLI args for authentication, e.g.
                ['--cookies', 'cookies.txt'] or ['--cookies-from-browser', 'edge'].
+    cancel: optional event; once set, the running yt-dlp is killed and
+            _ProbeCancelled is raised.
     """
     cmd = [
         YTDLP_BIN,
@@ -78,6 +369,7 @@ def _get_video_info(url: str, auth_args: list[str] | None = None) -> dict:
         "--no-warnings",
         "--no-check-formats",   # Don't verify format availability during info fetch
         *YTDLP_EXTRACTOR_ARGS,  # Use multiple player clients for age-restricted
+        *YTDLP_CACHE_ARGS,
         url,
     ]
     if auth_args:
@@ -85,45 +377,36 @@ def _get_video_info(url: str, auth_args: list[str] | None = None) -> dict:
 
     for attempt in range(MAX_DOWNLOAD_RETRIES):
         try:
-            proc = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=60,
-                text=True,
-            )
-            if proc.returncode == 0 and proc.stdout.strip():
-                return json.loads(proc.stdout)
-
-            stderr = proc.stderr.strip()
+            returncode, stdout, stderr = _run_probe(cmd, cancel, timeout=60)
+            if returncode == 0 and stdout.strip():
+                return json.loads(stdout)
+
+            stderr = stderr.strip()
 
             # Distinguish error types
-            if "Video unavailable" in stderr or "Private video" in stderr:
+            kinds = _ytdlp_error_kinds(stderr)
+            if "unavailable" in kinds:
                 raise ValueError("This video is unavailable or private. Please try a different URL.")
-            if "is not a valid URL" in stderr or "Unsupported URL" in stderr:
+            if "bad_url" in kinds:
                 raise ValueError("Invalid URL. Please provide a valid YouTube video link.")
-
             # Auth / age-restricted errors
-            if "Sign in to confirm" in stderr or "age" in stderr.lower():
+            if "auth" in kinds:
                 raise PermissionError("Needs auth")
-
             # Format errors — often caused by age-restriction hiding formats;
             # treat as a potential auth issue so the fallback can retry with cookies.
-            if "Requested format" in stderr or "format is not available" in stderr.lower():
+            if "format" in kinds:
                 raise PermissionError("Needs auth (format issue)")
-
             # "Only images are available" — age-restricted video without proper auth
-            if "Only images" in stderr or "no video formats" in stderr.lower():
+            if "images_only" in kinds:
                 raise PermissionError("Needs auth (images only)")
-
             # Browser cookie lock error / other file issues
-            if "Could not copy" in stderr or "locked" in stderr.lower() or "sqlite" in stderr.lower() or "Permission denied" in stderr:
+            if "cookie_access" in kinds:
                 raise FileNotFoundError(f"Cookie access issue: {stderr[:120]}")
 
             # Transient error — retry
             if attempt < MAX_DOWNLOAD_RETRIES - 1:
                 print(f"  ⟳ Info fetch failed (attempt {attempt + 1}), retrying...")
-                time.sleep(RETRY_BACKOFF_BASE * (attempt + 1))
+                _probe_backoff(RETRY_BACKOFF_BASE * (attempt + 1), cancel)
                 continue
 
             raise RuntimeError(f"Failed to get video info: {stderr[:300]}")
@@ -131,7 +414,7 @@ def _get_video_info(url: str, auth_args: list[str] | None = None) -> dict:
         except subprocess.TimeoutExpired:
             if attempt < MAX_DOWNLOAD_RETRIES - 1:
                 print(f"  ⟳ Info fetch timed out (attempt {attempt + 1}), retrying...")
-                time.sleep(RETRY_BACKOFF_BASE * (attempt + 1))
+                _probe_backoff(RETRY_BACKOFF_BASE * (attempt + 1), cancel)
                 continue
             raise RuntimeError("Timed out getting video info. The video may be too long or YouTube is slow.")
 
@@ -150,6 +433,7 @@ def _get_basic_video_info(url: str, auth_args: list[str] | None = None) -> dict
         "--no-warnings",
         "--no-check-formats",
         *YTDLP_EXTRACTOR_ARGS,
+        *YTDLP_CACHE_ARGS,
         "--print", "%(id)s|||%(title)s|||%(duration)s",
         url,
     ]
@@ -162,7 +446,7 @@ def _get_basic_video_info(url: str, auth_args: list[str] | None = None) -> dict
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             timeout=60,
-            text=True,
+            **_YTDLP_TEXT_IO,
         )
         stdout = proc.stdout.strip()
         if stdout and "|||" in stdout:
@@ -186,7 +470,8 @@ def _get_basic_video_info(url: str, auth_args: list[str] | None = None) -> dict
 def _build_auth_strategies() -> list[tuple[str, list[str] | None]]:
     """
     Build a list of (description, auth_args) tuples to try in order.
-    Includes: no auth, cookies.txt, and each installed browser.
+    Includes: no auth, cookies.txt, and each installed browser
+    (AVAILABLE_BROWSERS).
     """
     strategies: list[tuple[str, list[str] | None]] = [
         ("no cookies", None),
@@ -195,7 +480,7 @@ def _build_auth_strategies() -> list[tuple[str, list[str] | None]]:
     if COOKIES_FILE:
         strategies.append(("cookies.txt", ["--cookies", COOKIES_FILE]))
 
-    for browser in BROWSER_COOKIE_SOURCES:
+    for browser in AVAILABLE_BROWSERS:
         strategies.append(
             (f"browser cookies ({browser})", ["--cookies-from-browser", browser])
         )
@@ -203,6 +488,37 @@ def _build_auth_strategies() -> list[tuple[str, list[str] | None]]:
     return strategies
 
 
+def _try_auth_strategy(
+    url: str, desc: str, auth_args: list[str] | None, cancel: threading.Event | None = None
+) -> tuple[dict | None, Exception | None]:
+    """
+    Fetch info with one auth strategy. Returns (info, None) on success or
+    (None, error) for failures that should fall through to the next strategy.
+    A probe stopped through `cancel` returns (None, _ProbeCancelled) quietly.
+    ValueError (unavailable video, invalid URL) propagates.
+    """
+    try:
+        print(f"  Trying auth: {desc}...")
+        info = _get_video_info(url, auth_args=auth_args, cancel=cancel)
+        if cancel is not None and cancel.is_set():
+            raise _ProbeCancelled()
+        print(f"  ✓ Success with {desc}")
+        return info, None
+    except _ProbeCancelled as e:
+        return None, e
+    except PermissionError as e:
+        print(f"  ✗ {desc}: needs auth — {e}")
+        return None, e
+    except FileNotFoundError as e:
+        # Browser is open / cookie file locked — skip this one, try next
+        print(f"  ✗ {desc}: cookie access issue (browser may be open)")
+        return None, e
+    except RuntimeError as e:
+        # Transient errors after retries; try next auth strategy
+        print(f"  ✗ {desc}: {e}")
+        return None, e
+
+
 def _get_video_info_with_auth_fallback(url: str) -> tuple[dict, list[str] | None]:
     """
     Tries fetching info with multiple auth strategies in order:
@@ -210,31 +526,38 @@ def _get_video_info_with_auth_fallback(url: str) -> tuple[dict, list[str] | None
       2. cookies.txt (if present)
       3. --cookies-from-browser edge/chrome/firefox/brave
 
+    No cookies is tried on its own first since it covers most videos. If it
+    fails, the remaining strategies are probed concurrently and the first one
+    in priority order that succeeded wins, so a restricted video costs about
+    one extra probe of wall time instead of one per strategy.
+
     Returns (info_dict, auth_args_that_worked).
     """
     strategies = _build_auth_strategies()
-    last_error = None
-    cookie_file_error = None
 
-    for desc, auth_args in strategies:
+    desc, auth_args = strategies[0]
+    info, _ = _try_auth_strategy(url, desc, auth_args)
+    if info is not None:
+        return info, auth_args
+
+    remaining = strategies[1:]
+    if remaining:
+        executor = ThreadPoolExecutor(max_workers=len(remaining))
+        cancel = threading.Event()
         try:
-            print(f"  Trying auth: {desc}...")
-            info = _get_video_info(url, auth_args=auth_args)
-            print(f"  ✓ Success with {desc}")
-            return info, auth_args
-        except PermissionError as e:
-            print(f"  ✗ {desc}: needs auth — {e}")
-            last_error = e
-        except FileNotFoundError as e:
-            # Browser is open / cookie file locked — skip this one, try next
-            print(f"  ✗ {desc}: cookie access issue (browser may be open)")
-            cookie_file_error = e
-        except ValueError:
-            raise  # Video unavailable, invalid URL — don't retry
-        except RuntimeError as e:
-            # Transient errors after retries; try next auth strategy
-            print(f"  ✗ {desc}: {e}")
-            last_error = e
+            futures = [
+                (executor.submit(_try_auth_strategy, url, desc, auth_args, cancel), auth_args)
+                for desc, auth_args in remaining
+            ]
+            for future, auth_args in futures:
+                info, _ = future.result()
+                if info is not None:
+                    return info, auth_args
+        finally:
+            # Every higher-priority probe has already finished, so this only
+            # kills the lower-priority yt-dlp processes still running.
+            cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
 
     # All strategies failed. Try _get_basic_video_info as a last resort.
     print("  All auth strategies failed for --dump-json. Trying partial info extraction...")
@@ -256,23 +579,22 @@ def _get_video_info_with_auth_fallback(url: str) -> tuple[dict, list[str] | None
     )
 
 
-def _download_video_cli(url: str, output_dir: str, video_id: str, auth_args: list[str] | None = None) -> str | None:
+def _download_video_cli(
+    url: str, output_dir: str, video_id: str, auth_args: list[str] | None = None,
+    info_json: str | None = None, on_progress: Callable[[float], None] | None = None
+) -> str | None:
     """
     Download video using yt-dlp CLI.
     Tries multiple format strategies to avoid 'Requested format is not available'.
-    """
-    output_template = os.path.join(output_dir, f"{video_id}.%(ext)s")
+    on_progress, if given, receives yt-dlp's download percentage (0-100).
 
+    Every format strategy downloads into its own scratch dir (yt-dlp's temp
+    path), so partial files from a failed strategy never need to be found and
+    deleted before the next one; yt-dlp moves the finished video into
+    output_dir itself.
+    """
     for strategy_idx, fmt in enumerate(FORMAT_STRATEGIES):
-        # Clean any partial downloads from a previous failed strategy
-        for ext in [".mp4", ".webm", ".mkv", ".avi", ".part", ".ytdl"]:
-            for old in glob.glob(os.path.join(output_dir, f"*{ext}")):
-                try:
-                    os.remove(old)
-                except OSError:
-                    pass
-
-        cmd = [
+        base_cmd = [
             YTDLP_BIN,
             "--format", fmt,
             "--merge-output-format", "mp4",
@@ -280,126 +602,161 @@ def _download_video_cli(url: str, output_dir: str, video_id: str, auth_args: lis
             "--no-warnings",
             "--no-check-formats",  # Don't pre-check format availability
             *YTDLP_EXTRACTOR_ARGS,
+            *YTDLP_CACHE_ARGS,
             "--socket-timeout", "30",
             "--retries", "5",
             "--fragment-retries", "5",
-            "-o", output_template,
-            url,
+            "--concurrent-fragments", str(CONCURRENT_FRAGMENTS),
+            "--http-chunk-size", "10M",
+            "--file-access-retries", "3",  # AV scanners can briefly lock files on Windows
+            *_source_args(url, info_json),
         ]
         if auth_args:
-            cmd.extend(auth_args)
+            base_cmd.extend(auth_args)
 
-        for attempt in range(MAX_DOWNLOAD_RETRIES):
-            try:
-                print(f"  Downloading video (strategy {strategy_idx + 1}/{len(FORMAT_STRATEGIES)}, "
-                      f"attempt {attempt + 1}, format: {fmt})...")
-                proc = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    timeout=900,  # 15 min timeout for large videos
-                    text=True,
-                )
-                output = proc.stdout or ""
-
-                # Check for a downloaded video file
-                video_file = _find_file(output_dir, ".mp4")
-                if video_file and os.path.getsize(video_file) > 0:
-                    print(f"  ✓ Downloaded with format strategy {strategy_idx + 1}")
-                    return video_file
-
-                for ext in [".webm", ".mkv", ".avi"]:
-                    video_file = _find_file(output_dir, ext)
-                    if video_file and os.path.getsize(video_file) > 0:
-                        print(f"  ✓ Downloaded ({ext}) with format strategy {strategy_idx + 1}")
-                        return video_file
+        # Retries within a strategy share its dir so yt-dlp can resume .part files
+        strategy_dir = os.path.join(output_dir, f"_try_{strategy_idx}")
+        os.makedirs(strategy_dir, exist_ok=True)
+        # yt-dlp keeps fragments and the merge in temp: and moves only the
+        # finished file into home:
+        cmd = [
+            *base_cmd,
+            "-P", f"temp:{strategy_dir}",
+            "-P", f"home:{output_dir}",
+            "-o", f"{video_id}.%(ext)s",
+        ]
 
-                # If the error is about format availability, skip retries
-                # and jump to the next format strategy immediately
-                if proc.returncode != 0:
-                    if "Requested format" in output or "format is not available" in output.lower():
-                        print(f"  ✗ Format strategy {strategy_idx + 1} not available, trying next...")
-                        break  # break retry loop, go to next strategy
-                    if "Only images" in output:
-                        print(f"  ✗ Only images available (auth issue), trying next strategy...")
-                        break
-                    print(f"  ⟳ Download output: {output[-300:]}")
-
-                if attempt < MAX_DOWNLOAD_RETRIES - 1:
-                    print(f"  ⟳ No video file found, retrying...")
-                    time.sleep(RETRY_BACKOFF_BASE * (attempt + 1))
-                    continue
+        try:
+            for attempt in range(MAX_DOWNLOAD_RETRIES):
+                try:
+                    print(f"  Downloading video (strategy {strategy_idx + 1}/{len(FORMAT_STRATEGIES)}, "
+                          f"attempt {attempt + 1}, format: {fmt})...")
+                    returncode, output = _run_ytdlp_streaming(
+                        cmd,
+                        timeout=900,  # 15 min timeout for large videos
+                        on_progress=on_progress,
+                        # Unavailable formats never recover on retry — stop right away
+                        abort_kinds=frozenset({"format", "images_only"}),
+                    )
+
+                    # Check for a downloaded video file (mp4 preferred)
+                    video_file = _find_first_by_exts(output_dir, VIDEO_EXTS, min_size=1)
+                    if video_file:
+                        print(f"  ✓ Downloaded ({os.path.splitext(video_file)[1]}) "
+                              f"with format strategy {strategy_idx + 1}")
+                        return video_file
 
-            except subprocess.TimeoutExpired:
-                if attempt < MAX_DOWNLOAD_RETRIES - 1:
-                    print(f"  ⟳ Download timed out (attempt {attempt + 1}), retrying...")
-                    time.sleep(RETRY_BACKOFF_BASE * (attempt + 1))
-                    continue
-                raise RuntimeError(
-                    "Video download timed out. The video may be too large."
-                )
+                    # If the error is about format availability, skip retries
+                    # and jump to the next format strategy immediately
+                    if returncode != 0:
+                        kinds = _ytdlp_error_kinds(output)
+                        if "format" in kinds:
+                            print(f"  ✗ Format strategy {strategy_idx + 1} not available, trying next...")
+                            break  # break retry loop, go to next strategy
+                        if "images_only" in kinds:
+                            print(f"  ✗ Only images available (auth issue), trying next strategy...")
+                            break
+                        print(f"  ⟳ Download output: {output[-300:]}")
+
+                    if attempt < MAX_DOWNLOAD_RETRIES - 1:
+                        print(f"  ⟳ No video file found, retrying...")
+                        time.sleep(RETRY_BACKOFF_BASE * (attempt + 1))
+                        continue
+
+                except subprocess.TimeoutExpired:
+                    if attempt < MAX_DOWNLOAD_RETRIES - 1:
+                        print(f"  ⟳ Download timed out (attempt {attempt + 1}), retrying...")
+                        time.sleep(RETRY_BACKOFF_BASE * (attempt + 1))
+                        continue
+                    raise RuntimeError(
+                        "Video download timed out. The video may be too large."
+                    )
+        finally:
+            shutil.rmtree(strategy_dir, ignore_errors=True)
 
     return None
 
 
-def _download_captions_cli(url: str, output_dir: str, video_id: str, auth_args: list[str] | None = None) -> str | None:
+def _download_captions_cli(
+    url: str, output_dir: str, video_id: str, auth_args: list[str] | None = None,
+    info_json: str | None = None
+) -> str | None:
     """
     Download captions using yt-dlp CLI.
-    Tries both manually uploaded and auto-generated captions.
-    Tries multiple languages in priority order.
+    Manually uploaded captions are preferred over auto-generated ones. Each
+    pass requests every language in SUBTITLE_LANGS at once and the best one is
+    picked by priority; both passes run side by side in their own scratch
+    dirs, so this costs about one yt-dlp run of wall time.
     """
-    # Strategy 1: Try manually uploaded subtitles first (higher quality)
-    for lang in SUBTITLE_LANGS:
-        srt = _try_caption_download(
-            url, output_dir, video_id, lang, auto=False, auth_args=auth_args
-        )
-        if srt:
-            print(f"  ✓ Got manual captions ({lang}): {os.path.basename(srt)}")
-            return srt
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        passes = [
+            (kind, executor.submit(_try_caption_download, url, output_dir, video_id, auto=auto,
+                                   auth_args=auth_args, info_json=info_json))
+            for kind, auto in (("manual", False), ("auto", True))
+        ]
+        results = [(kind, future.result()) for kind, future in passes]
 
-    # Strategy 2: Try auto-generated captions
-    for lang in SUBTITLE_LANGS:
-        srt = _try_caption_download(
-            url, output_dir, video_id, lang, auto=True, auth_args=auth_args
-        )
-        if srt:
-            print(f"  ✓ Got auto captions ({lang}): {os.path.basename(srt)}")
-            return srt
+    chosen = None
+    for kind, srt in results:
+        if not srt:
+            continue
+        if chosen is None:
+            chosen = os.path.join(output_dir, os.path.basename(srt))
+            shutil.move(srt, chosen)
+            print(f"  ✓ Got {kind} captions: {os.path.basename(chosen)}")
+        shutil.rmtree(os.path.dirname(srt), ignore_errors=True)
 
-    return None
+    return chosen
 
 
-def _try_caption_download(
-    url: str, output_dir: str, video_id: str, lang: str, auto: bool,
-    auth_args: list[str] | None = None
+def _pick_srt_by_priority(
+    directory: str, video_id: str, fallback: bool = True, min_size: int = 0
 ) -> str | None:
-    """Attempt to download captions for a specific language."""
+    """
+    Pick the SRT whose language comes first in SUBTITLE_LANGS, with one
+    directory scan. With `fallback`, any SRT in the directory is taken if none
+    matches. Files smaller than `min_size` bytes are ignored.
+    """
+    srts: dict[str, str] = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.lower().endswith(".srt") and entry.is_file():
+                if entry.stat().st_size >= min_size:
+                    srts[entry.name] = entry.path
+    for lang in SUBTITLE_LANGS:
+        path = srts.get(f"{video_id}.{lang}.srt")
+        if path:
+            return path
+    if not fallback:
+        return None
+    # yt-dlp may have written a variant name (e.g. "en-orig") — take any SRT
+    return next(iter(srts.values()), None)
+
+
+def _run_caption_pass(
+    url: str, subdir: str, video_id: str, auto: bool, langs: str,
+    auth_args: list[str] | None = None, info_json: str | None = None
+) -> tuple[str | None, bool]:
+    """
+    One yt-dlp caption run for the comma-separated `langs` into `subdir`.
+    Returns (srt_path or None, whether YouTube rate limited the run).
+    """
     kind = "auto" if auto else "manual"
-    print(f"  Trying {kind} captions: {lang}...")
-
-    # Clean any previous subtitle files to avoid confusion
-    for f in glob.glob(os.path.join(output_dir, "*.srt")):
-        try:
-            os.remove(f)
-        except OSError:
-            pass
-    for f in glob.glob(os.path.join(output_dir, "*.vtt")):
-        try:
-            os.remove(f)
-        except OSError:
-            pass
-
     cmd = [
         YTDLP_BIN,
         "--skip-download",
         "--no-playlist",
         "--no-warnings",
         "--no-check-formats",
+        # A failed track (e.g. a 429 on an auto-translated language) must not
+        # abort the run before the tracks that did download are converted
+        "--ignore-errors",
         *YTDLP_EXTRACTOR_ARGS,
-        "--sub-lang", lang,
+        *YTDLP_CACHE_ARGS,
+        "--sub-langs", langs,
         "--convert-subs", "srt",
-        "-o", os.path.join(output_dir, f"{video_id}.%(ext)s"),
-        url,
+        "-o", os.path.join(subdir, f"{video_id}.%(ext)s"),
+        *_source_args(url, info_json),
     ]
     if auth_args:
         cmd.extend(auth_args)
@@ -414,35 +771,91 @@ def _try_caption_download(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            timeout=60,
-            text=True,
+            timeout=120,
+            **_YTDLP_TEXT_IO,
         )
         output = proc.stdout or ""
 
         # Check if an SRT was produced
-        srt = _find_srt_file(output_dir)
-        if srt and os.path.getsize(srt) > 50:  # at least 50 bytes = real content
-            return srt
+        srt = _pick_srt_by_priority(subdir, video_id, min_size=51)  # > 50 bytes = real content
+        if srt:
+            return srt, False
 
-        # Rate limited — wait before next attempt
         if "429" in output or "Too Many Requests" in output:
-            print(f"  ✗ Rate limited for '{lang}', waiting 5s...")
-            time.sleep(5)
-        else:
-            time.sleep(0.5)
+            print(f"  ✗ Rate limited for '{langs}' ({kind})")
+            return None, True
 
     except subprocess.TimeoutExpired:
-        print(f"  ✗ Timeout for '{lang}' ({kind})")
+        print(f"  ✗ Timeout for '{langs}' ({kind})")
     except Exception as e:
-        print(f"  ✗ Error for '{lang}' ({kind}): {e}")
+        print(f"  ✗ Error for '{langs}' ({kind}): {e}")
+
+    return None, False
+
 
+def _try_caption_download(
+    url: str, output_dir: str, video_id: str, auto: bool,
+    auth_args: list[str] | None = None, info_json: str | None = None
+) -> str | None:
+    """
+    Attempt to download captions in all SUBTITLE_LANGS with one yt-dlp run.
+    If that run is rate limited without producing an SRT, fall back to one
+    run per language, waiting CAPTION_RATE_LIMIT_WAIT after each 429.
+    Returns the SRT path inside this pass's scratch dir; the caller moves it
+    out and removes the dir. On failure the scratch dir is removed here.
+    """
+    kind = "auto" if auto else "manual"
+    langs = ",".join(SUBTITLE_LANGS)
+    print(f"  Trying {kind} captions: {langs}...")
+
+    # Each pass writes into its own scratch dir, so passes cannot see or
+    # overwrite each other's files and the result check scans only this one
+    subdir = os.path.join(output_dir, f"_sub_{kind}")
+    os.makedirs(subdir, exist_ok=True)
+
+    srt, rate_limited = _run_caption_pass(url, subdir, video_id, auto, langs, auth_args, info_json)
+    if srt:
+        return srt
+
+    if rate_limited:
+        for lang in SUBTITLE_LANGS:
+            if rate_limited:
+                time.sleep(CAPTION_RATE_LIMIT_WAIT)
+            print(f"  Trying {kind} captions: {lang}...")
+            srt, rate_limited = _run_caption_pass(url, subdir, video_id, auto, lang, auth_args, info_json)
+            if srt:
+                return srt
+
+    shutil.rmtree(subdir, ignore_errors=True)
     return None
 
 
-def download_video(url: str, output_dir: str) -> dict:
+def _srt_language(srt_path: str, default: str = "en") -> str:
+    """
+    Subtitle language from a yt-dlp SRT name: videoId.LANG.srt (e.g.
+    dQw4w9WgXcQ.hi.srt → "hi"). Falls back to `default` for odd names.
+    """
+    stem, _, _ = os.path.basename(srt_path).rpartition(".")
+    head, _, lang = stem.rpartition(".")
+    # valid lang codes: "en", "hi", "en-US", etc.
+    if head and 0 < len(lang) <= 5 and lang.replace("-", "").isalpha():
+        return lang.lower()
+    return default
+
+
+def download_video(
+    url: str,
+    output_dir: str,
+    on_progress: Callable[[float], None] | None = None,
+    on_captions: Callable[[str, str], None] | None = None,
+) -> dict:
     """
     Download a YouTube video and its captions.
     Uses yt-dlp CLI with robust retries, format fallbacks, and multi-strategy auth.
+    on_progress, if given, receives the video download percentage (0-100).
+    on_captions, if given, is called with (srt_path, subtitle_lang) as soon as
+    the captions are ready, while the video may still be downloading; an
+    exception it raises fails the download.
 
     Returns:
         dict with keys: video_path, srt_path, title, duration, video_id
@@ -452,18 +865,28 @@ def download_video(url: str, output_dir: str) -> dict:
         RuntimeError: for infrastructure failures (network, timeout)
         FileNotFoundError: when download succeeds but files are missing
     """
-    # Clean previous downloads
+    # Clean previous downloads (including scratch dirs left by a crashed run)
     if os.path.exists(output_dir):
-        for f in glob.glob(os.path.join(output_dir, "*")):
-            try:
-                os.remove(f)
-            except OSError:
-                pass
+        with os.scandir(output_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
     os.makedirs(output_dir, exist_ok=True)
 
     # ── Get video metadata ──
     print("Getting video info...")
-    info, auth_args = _get_video_info_with_auth_fallback(url)
+    cached = _load_cached_info(url)
+    if cached:
+        info, auth_args = cached
+        print("  ✓ Using cached video info")
+    else:
+        info, auth_args = _get_video_info_with_auth_fallback(url)
+        _store_cached_info(url, info, auth_args)
     video_id = info.get("id", "video")
     title = info.get("title", "Untitled")
     duration = info.get("duration", 0)
@@ -486,8 +909,36 @@ def download_video(url: str, output_dir: str) -> dict:
             "Please provide a shorter video."
         )
 
-    # ── Download video ──
-    video_path = _download_video_cli(url, output_dir, video_id, auth_args=auth_args)
+    # Reuse the extracted info for the video and caption runs
+    info_json = _write_info_json(info, output_dir, video_id)
+
+    # ── Download video and captions ──
+    # Independent network-bound yt-dlp runs: fetch captions while the video
+    # downloads instead of after it.
+    cached_srt = _load_cached_captions(video_id, output_dir)
+    if cached_srt:
+        print(f"  ✓ Using cached captions: {os.path.basename(cached_srt)}")
+
+    def fetch_captions() -> str | None:
+        srt = cached_srt
+        if not srt:
+            srt = _download_captions_cli(url, output_dir, video_id,
+                                         auth_args=auth_args, info_json=info_json)
+            if srt:
+                _store_cached_captions(srt)
+        if srt and on_captions:
+            on_captions(srt, _srt_language(srt))
+        return srt
+
+    print("Downloading video and captions...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        video_future = executor.submit(_download_video_cli, url, output_dir, video_id,
+                                       auth_args=auth_args, info_json=info_json,
+                                       on_progress=on_progress)
+        srt_future = executor.submit(fetch_captions)
+        video_path = video_future.result()
+        srt_path = srt_future.result()
+
     if video_path is None:
         raise FileNotFoundError(
             "Video file could not be downloaded. "
@@ -496,25 +947,13 @@ def download_video(url: str, output_dir: str) -> dict:
         )
     print(f"  ✓ Video ready: {os.path.basename(video_path)}")
 
-    # ── Download captions ──
-    print("Downloading captions...")
-    srt_path = _download_captions_cli(url, output_dir, video_id, auth_args=auth_args)
     if srt_path is None:
         raise ValueError(
             "No captions available for this video (neither manual nor auto-generated). "
             "This tool requires videos with captions. Please try a different video."
         )
 
-    # Detect subtitle language from filename (e.g. "video.hi.srt" → "hi")
-    subtitle_lang = "en"  # default
-    if srt_path:
-        basename = os.path.basename(srt_path)
-        # Pattern: videoId.LANG.srt  (e.g. dQw4w9WgXcQ.hi.srt)
-        parts = basename.rsplit(".", 2)
-        if len(parts) >= 3:
-            detected = parts[-2].lower()
-            if len(detected) <= 5:  # valid lang codes: "en", "hi", "en-US", etc.
-                subtitle_lang = detected
+    subtitle_lang = _srt_language(srt_path)
     print(f"  Detected subtitle language: {subtitle_lang}")
 
     return {
@@ -1,23 +1,55 @@
 import os
+import time
 import uuid
+import threading
 import traceback
+import concurrent.futures
 from config import DOWNLOADS_DIR, OUTPUTS_DIR
 from downloader import download_video
 from transcript import parse_srt, clean_transcript, merge_segments, format_for_llm
 from segmenter import segment_transcript
-from validator import validate_clips
+from validator import validate_clips, RangeSet
 from cutter import cut_clips
 
 # In-memory job store
 _jobs: dict[str, dict] = {}
 
+# Finished (done/error) jobs are dropped this long after they finish, so the
+# store only holds active jobs plus recent results.
+FINISHED_JOB_TTL = 3600  # seconds
+
+# Jobs left in review (downloaded but never continued) are dropped this long
+# after they entered review, so abandoned tabs do not pin transcripts forever.
+REVIEW_JOB_TTL = 3 * 3600  # seconds
+
 
 def get_job(job_id: str) -> dict | None:
     return _jobs.get(job_id)
 
 
+def update_job(job: dict, **fields) -> None:
+    """
+    Apply several field changes (status/progress/message...) in one dict
+    update, so a status poll never sees a half-applied transition.
+    """
+    job.update(fields)
+
+
+def _evict_finished_jobs() -> None:
+    """Drop done/error jobs past FINISHED_JOB_TTL and review jobs past REVIEW_JOB_TTL."""
+    now = time.time()
+    cutoff = now - FINISHED_JOB_TTL
+    review_cutoff = now - REVIEW_JOB_TTL
+    for job_id, job in list(_jobs.items()):
+        if job.get("finished_at", cutoff) < cutoff:
+            _jobs.pop(job_id, None)
+        elif job["status"] == "review" and job.get("review_at", review_cutoff) < review_cutoff:
+            _jobs.pop(job_id, None)
+
+
 def create_job(youtube_url: str) -> str:
     """Create a job entry and return its ID (does not start processing)."""
+    _evict_finished_jobs()
     job_id = str(uuid.uuid4())[:8]
     _jobs[job_id] = {
         "id": job_id,
@@ -39,6 +71,26 @@ def create_job(youtube_url: str) -> str:
     return job_id
 
 
+def _parse_captions(srt_path: str) -> tuple[list[dict], str]:
+    """Parse, clean and merge an SRT file. Returns (merged_segments, llm_text)."""
+    segments = parse_srt(srt_path)
+    if not segments:
+        raise ValueError(
+            "No valid caption segments found in the subtitle file. "
+            "The captions may be empty or corrupted."
+        )
+
+    cleaned = clean_transcript(segments)
+    if not cleaned:
+        raise ValueError(
+            "All caption segments were noise (e.g. [Music]). "
+            "No usable text found."
+        )
+
+    merged = merge_segments(cleaned)
+    return merged, format_for_llm(merged)
+
+
 def run_download_phase(job_id: str) -> None:
     """
     Phase 1: Download video + captions, parse transcript.
@@ -50,12 +102,31 @@ def run_download_phase(job_id: str) -> None:
 
     try:
         # ── Step 1: Download ─────────────────────────────
-        job["status"] = "downloading"
-        job["progress"] = 10
-        job["message"] = "Downloading video and captions..."
+        update_job(
+            job,
+            status="downloading",
+            progress=10,
+            message="Downloading video and captions...",
+        )
+
+        def on_download_progress(percent: float) -> None:
+            # Map the video download onto the 10-30% band of the job bar
+            update_job(
+                job,
+                progress=max(job["progress"], 10 + int(percent * 0.2)),
+                message=f"Downloading video... {percent:.0f}%",
+            )
+
+        # Captions usually land well before the video finishes, so the
+        # transcript is parsed on the caption thread while the video downloads.
+        parsed = {}
+
+        def on_captions(srt_path: str, subtitle_lang: str) -> None:
+            parsed["merged"], parsed["formatted"] = _parse_captions(srt_path)
 
         download_dir = os.path.join(DOWNLOADS_DIR, job_id)
-        result = download_video(youtube_url, download_dir)
+        result = download_video(youtube_url, download_dir,
+                                on_progress=on_download_progress, on_captions=on_captions)
         job["video_title"] = result["title"]
         job["video_path"] = result["video_path"]
         job["video_filename"] = os.path.basename(result["video_path"])
@@ -63,42 +134,23 @@ def run_download_phase(job_id: str) -> None:
         job["duration"] = result["duration"]
         job["subtitle_lang"] = result.get("subtitle_lang", "en")
 
-        # ── Step 2: Parse transcript ─────────────────────
-        job["status"] = "parsing"
-        job["progress"] = 30
-        job["message"] = "Parsing captions..."
-
-        segments = parse_srt(result["srt_path"])
-        if not segments:
-            raise ValueError(
-                "No valid caption segments found in the subtitle file. "
-                "The captions may be empty or corrupted."
-            )
-
-        cleaned = clean_transcript(segments)
-        if not cleaned:
-            raise ValueError(
-                "All caption segments were noise (e.g. [Music]). "
-                "No usable text found."
-            )
-
-        merged = merge_segments(cleaned)
-        formatted = format_for_llm(merged)
-
+        # ── Step 2: Transcript (already parsed by on_captions) ──
         # Store for later use in phase 2 and for the UI
-        job["transcript_segments"] = merged
-        job["transcript_formatted"] = formatted
+        job["transcript_segments"] = parsed["merged"]
+        job["transcript_formatted"] = parsed["formatted"]
 
         # ── Ready for review ─────────────────────────────
-        job["status"] = "review"
-        job["progress"] = 40
-        job["message"] = "Download complete! Review the video and transcript."
+        update_job(
+            job,
+            status="review",
+            progress=40,
+            message="Download complete! Review the video and transcript.",
+            review_at=time.time(),
+        )
 
     except Exception as e:
-        job["status"] = "error"
-        job["progress"] = 0
-        job["message"] = str(e)
-        job["error"] = traceback.format_exc()
+        update_job(job, status="error", progress=0, message=str(e),
+                   error=traceback.format_exc(), finished_at=time.time())
 
 
 def run_analysis_phase(job_id: str) -> None:
@@ -106,9 +158,6 @@ def run_analysis_phase(job_id: str) -> None:
     Phase 2: LLM segmentation, validation, and cutting concurrently.
     Called only after user approves via the 'Continue' button.
     """
-    import concurrent.futures
-    import threading
-
     job = _jobs[job_id]
 
     try:
@@ -121,9 +170,12 @@ def run_analysis_phase(job_id: str) -> None:
         transcript_end = merged[-1]["end"] if merged else 0
 
         # ── Step 3: LLM segmentation (Streaming) ────────
-        job["status"] = "analyzing"
-        job["progress"] = 55
-        job["message"] = "AI is streaming analysis and processing clips in parallel..."
+        update_job(
+            job,
+            status="analyzing",
+            progress=55,
+            message="AI is streaming analysis and processing clips in parallel...",
+        )
         
         subtitle_lang = job.get("subtitle_lang", "en")
         video_duration = job.get("duration", 0)
@@ -131,7 +183,7 @@ def run_analysis_phase(job_id: str) -> None:
         output_dir = os.path.join(OUTPUTS_DIR, job_id)
         os.makedirs(output_dir, exist_ok=True)
         
-        used_ranges = []
+        used_ranges = RangeSet()
         state_lock = threading.Lock()
         
         def process_single_clip(valid_clip):
@@ -149,6 +201,7 @@ def run_analysis_phase(job_id: str) -> None:
                 # Word-level generation happens ON DEMAND when user opens the React Editor.
                 final_clip["word_segments"] = []
                 final_clip["burned_filename"] = "" 
+                final_clip["segment_count"] = len(final_clip["segments"])
                 
                 with state_lock:
                     job["clips"].append(final_clip)
@@ -174,24 +227,12 @@ def run_analysis_phase(job_id: str) -> None:
                         continue
                     
                     valid_clip = valid[0]
-                    
-                    # Check overlap manually
-                    overlaps = False
-                    for seg in valid_clip["segments"]:
-                        for used_start, used_end in used_ranges:
-                            if seg["start"] < used_end and seg["end"] > used_start:
-                                overlaps = True
-                                break
-                        if overlaps:
-                            break
-                    
-                    if overlaps:
+
+                    # Skip clips overlapping one already accepted; otherwise
+                    # commit its ranges
+                    if not used_ranges.claim_clip(valid_clip):
                         continue
-                        
-                    # Commit ranges
-                    for seg in valid_clip["segments"]:
-                        used_ranges.append((seg["start"], seg["end"]))
-                        
+
                 # Submit to worker thread
                 futures.append(executor.submit(process_single_clip, valid_clip))
             
@@ -204,12 +245,17 @@ def run_analysis_phase(job_id: str) -> None:
 
         # ── Done ─────────────────────────────────────────
         if job["status"] != "error":
-            job["status"] = "done"
-            job["progress"] = 100
-            job["message"] = f"Successfully created {len(job['clips'])} shorts!"
+            update_job(
+                job,
+                status="done",
+                progress=100,
+                message=f"Successfully created {len(job['clips'])} shorts!",
+                finished_at=time.time(),
+                # Only phase 2 and the review screen read the transcript
+                transcript_segments=[],
+                transcript_formatted="",
+            )
 
     except Exception as e:
-        job["status"] = "error"
-        job["progress"] = 0
-        job["message"] = str(e)
-        job["error"] = traceback.format_exc()
+        update_job(job, status="error", progress=0, message=str(e),
+                   error=traceback.format_exc(), finished_at=time.time())
@@ -1,8 +1,24 @@
+import os
 import json
+import hashlib
+import functools
+import random
 import re
+import threading
 import time
-from openai import OpenAI
-from config import OPENROUTER_API_KEY, OPENROUTER_MODEL, CHUNK_MINUTES, MAX_RETRIES
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+from config import (
+    OPENROUTER_API_KEY, OPENROUTER_MODEL, CHUNK_MINUTES, MAX_RETRIES, LLM_CACHE_TTL, BASE_DIR,
+)
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# Concurrent LLM requests for multi-chunk transcripts (bounded to stay
+# within provider rate limits; 429s fall through to _call_llm's retries)
+LLM_MAX_WORKERS = 4
 
 
 # ── Language-specific prompt blocks ───────────────────────────────────────────
@@ -286,15 +302,29 @@ Requirements per clip:
 
 Each clip MUST have a "segments" array. Single-segment clips have exactly one entry in the array."""
 
+# Formatted once per language at import; the prompt is only ever read
+_SYSTEM_PROMPTS = {
+    lang: SYSTEM_PROMPT.format(lang_instructions=block)
+    for lang, block in _LANG_INSTRUCTIONS.items()
+}
+
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def _mmss_to_seconds(mmss: str) -> float:
-    """Convert MM:SS string to seconds."""
-    parts = mmss.strip().split(":")
-    if len(parts) == 2:
-        return int(parts[0]) * 60 + int(parts[1])
-    return 0.0
+# Compiled once here rather than looked up in re's cache on every response
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_FENCE_RE = re.compile(r"```(?:json)?\s*\n?(.*?)```", re.DOTALL)
+# Start time of a formatted transcript line: "[12:34–12:50] text"
+_TS_RE = re.compile(r"\s*\[?(\d+):(\d+)")
+
+
+def _line_start_seconds(line: str) -> float | None:
+    """Start time of a formatted transcript line in seconds, or None."""
+    m = _TS_RE.match(line)
+    if not m:
+        return None
+    return int(m.group(1)) * 60 + int(m.group(2))
 
 
 def _chunk_transcript(formatted_text: str, chunk_minutes: int = CHUNK_MINUTES) -> list[str]:
@@ -310,137 +340,116 @@ def _chunk_transcript(formatted_text: str, chunk_minutes: int = CHUNK_MINUTES) -
     if not lines:
         return []
 
-    chunks = []
-    current_chunk = []
+    # One pass: record the line index each chunk starts at, join at the end
+    bounds = [0]
+    chunk_seconds = chunk_minutes * 60
     chunk_start_time = None
-    chunk_start_times = []
+    last_time = None
 
-    for line in lines:
-        try:
-            time_part = line.split("–")[0].replace("[", "").strip()
-            start_time = _mmss_to_seconds(time_part)
-        except (ValueError, IndexError):
-            current_chunk.append(line)
+    for i, line in enumerate(lines):
+        start_time = _line_start_seconds(line)
+        if start_time is None:
             continue
+        last_time = start_time
 
         if chunk_start_time is None:
             chunk_start_time = start_time
-
-        if start_time - chunk_start_time >= chunk_minutes * 60 and current_chunk:
-            chunks.append("\n".join(current_chunk))
-            chunk_start_times.append(chunk_start_time)
-            current_chunk = [line]
+        elif start_time - chunk_start_time >= chunk_seconds and i > bounds[-1]:
+            bounds.append(i)
             chunk_start_time = start_time
-        else:
-            current_chunk.append(line)
-
-    if current_chunk:
-        chunks.append("\n".join(current_chunk))
-        chunk_start_times.append(chunk_start_time or 0)
 
     # Merge the last chunk into the previous one if it's too short
-    if len(chunks) >= 2:
-        last_start = chunk_start_times[-1]
-        last_chunk_end = last_start
-        for line in chunks[-1].strip().split("\n"):
-            try:
-                time_part = line.split("–")[0].replace("[", "").strip()
-                last_chunk_end = _mmss_to_seconds(time_part)
-            except (ValueError, IndexError):
-                continue
-
-        last_chunk_duration = last_chunk_end - last_start
+    if len(bounds) >= 2:
+        last_chunk_duration = last_time - chunk_start_time
         if last_chunk_duration < MIN_LAST_CHUNK_MINUTES * 60:
             print(f"  Merging short last chunk ({last_chunk_duration:.0f}s) into previous chunk")
-            chunks[-2] = chunks[-2] + "\n" + chunks[-1]
-            chunks.pop()
-            chunk_start_times.pop()
+            bounds.pop()
 
-    return chunks
+    bounds.append(len(lines))
+    return ["\n".join(lines[a:b]) for a, b in zip(bounds, bounds[1:])]
 
 
 def _strip_think_blocks(text: str) -> str:
     """Remove <think>...</think> blocks that reasoning models prepend."""
-    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+    return _THINK_RE.sub("", text).strip()
 
 
 def _repair_json(text: str) -> str:
     """Fix common JSON issues from LLM output."""
-    text = re.sub(r",\s*([}\]])", r"\1", text)   # trailing commas
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)   # trailing commas
     text = text.replace("\ufeff", "").replace("\u200b", "")  # invisible chars
     return text
 
 
-def _extract_json(text: str) -> str | None:
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _scan_json(text: str, opener: str, accept) -> dict | list | None:
+    """
+    Try to decode a JSON value at every `opener` in the text and return the
+    first one `accept` approves. raw_decode does the matching in C, so no
+    manual depth counting is needed.
+    """
+    pos = text.find(opener)
+    while pos != -1:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if accept(data):
+                return data
+        # Step one char on, not past the value: a nested block may match
+        pos = text.find(opener, pos + 1)
+    return None
+
+
+def _is_clips_object(data) -> bool:
+    return isinstance(data, dict) and "clips" in data
+
+
+def _is_clips_list(data) -> bool:
+    return isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict)
+
+
+def _extract_json(text: str) -> dict | list | None:
     """
-    Robustly extract a JSON object from the model's response.
+    Robustly extract a JSON value from the model's response.
     Handles markdown fences, thinking blocks, and messy wrapper text.
+    Returns the decoded value, or None if nothing usable was found.
     """
-    text = _strip_think_blocks(text)
+    text = _repair_json(_strip_think_blocks(text))
 
     # Strategy 1: JSON inside markdown code fences
-    fence_match = re.search(r"```(?:json)?\s*\n?(.*?)```", text, re.DOTALL)
+    fence_match = _FENCE_RE.search(text)
     if fence_match:
-        candidate = _repair_json(fence_match.group(1).strip())
         try:
-            json.loads(candidate)
-            return candidate
+            return json.loads(fence_match.group(1).strip())
         except json.JSONDecodeError:
             pass
 
-    # Strategy 2: Find balanced { } blocks — prefer ones containing "clips" key
-    pos = 0
-    while pos < len(text):
-        brace_start = text.find("{", pos)
-        if brace_start == -1:
-            break
-        depth = 0
-        for i in range(brace_start, len(text)):
-            if text[i] == "{":
-                depth += 1
-            elif text[i] == "}":
-                depth -= 1
-                if depth == 0:
-                    candidate = _repair_json(text[brace_start:i + 1])
-                    try:
-                        data = json.loads(candidate)
-                        if isinstance(data, dict) and "clips" in data:
-                            return candidate
-                    except json.JSONDecodeError:
-                        pass
-                    break
-        pos = brace_start + 1
-
-    # Strategy 3: Find balanced [ ] blocks (bare list of clips)
-    pos = 0
-    while pos < len(text):
-        bracket_start = text.find("[", pos)
-        if bracket_start == -1:
-            break
-        depth = 0
-        for i in range(bracket_start, len(text)):
-            if text[i] == "[":
-                depth += 1
-            elif text[i] == "]":
-                depth -= 1
-                if depth == 0:
-                    candidate = _repair_json(text[bracket_start:i + 1])
-                    try:
-                        data = json.loads(candidate)
-                        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                            return candidate
-                    except json.JSONDecodeError:
-                        pass
-                    break
-        pos = bracket_start + 1
-
-    # Strategy 4: try the whole text directly
-    repaired = _repair_json(text)
+    # Strategy 2: the whole text is the clips JSON (the common case)
     try:
-        json.loads(repaired)
-        return repaired
+        whole = json.loads(text)
     except json.JSONDecodeError:
-        pass
+        whole = None
+    if _is_clips_object(whole) or _is_clips_list(whole):
+        return whole
+
+    # Strategy 3: first { } block containing a "clips" key (also finds one
+    # nested inside a wrapper object)
+    data = _scan_json(text, "{", _is_clips_object)
+    if data is not None:
+        return data
+
+    # Strategy 4: first [ ] block that is a bare list of clips
+    data = _scan_json(text, "[", _is_clips_list)
+    if data is not None:
+        return data
+
+    # Strategy 5: valid JSON of some other shape; let the caller reject it
+    if whole is not None:
+        return whole
 
     preview = text[:500].replace("\n", " ")
     print(f"  ✗ Could not extract JSON. Response preview: {preview}")
@@ -487,10 +496,119 @@ def _normalize_clips(clips: list[dict]) -> list[dict]:
     return normalized
 
 
-def _get_lang_instructions(subtitle_lang: str) -> str:
-    """Get the language-specific prompt block."""
+def _get_system_prompt(subtitle_lang: str) -> str:
+    """Get the system prompt with the language-specific block filled in."""
     base_lang = subtitle_lang.split("-")[0].lower()
-    return _LANG_INSTRUCTIONS.get(base_lang, _LANG_INSTRUCTIONS["en"])
+    return _SYSTEM_PROMPTS.get(base_lang, _SYSTEM_PROMPTS["en"])
+
+
+# ── Response cache ─────────────────────────────────────────────────────────────
+
+_LLM_CACHE_DIR = os.path.join(BASE_DIR, ".llm_cache")
+
+# Requests currently being made, by cache path, so identical ones can share
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _llm_cache_path(system_prompt: str, user_prompt: str) -> str:
+    ident = "\0".join((OPENROUTER_MODEL, system_prompt, user_prompt))
+    key = hashlib.sha256(ident.encode("utf-8")).hexdigest()
+    return os.path.join(_LLM_CACHE_DIR, f"{key}.json")
+
+
+def _load_cached_clips(cache_path: str) -> list[dict] | None:
+    """Normalized clips from an earlier identical request, if within LLM_CACHE_TTL."""
+    if LLM_CACHE_TTL <= 0:
+        return None
+    try:
+        if time.time() - os.stat(cache_path).st_mtime > LLM_CACHE_TTL:
+            return None
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _prune_llm_cache() -> None:
+    """Drop responses past LLM_CACHE_TTL so the cache dir does not grow forever."""
+    try:
+        with os.scandir(_LLM_CACHE_DIR) as it:
+            for entry in it:
+                try:
+                    if time.time() - entry.stat().st_mtime > LLM_CACHE_TTL:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
+def _store_cached_clips(cache_path: str, clips: list[dict]) -> None:
+    if LLM_CACHE_TTL <= 0:
+        return
+    _prune_llm_cache()
+    try:
+        os.makedirs(_LLM_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(clips, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"  ✗ Could not cache LLM response: {e}")
+
+
+# ── Client ─────────────────────────────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> "OpenAI":
+    """
+    One OpenRouter client per process. The client is thread-safe and keeps a
+    pooled HTTP connection, so concurrent chunk calls and retries reuse it.
+    The openai package (and httpx/pydantic under it) is imported here on
+    first use rather than at app startup.
+    """
+    from openai import OpenAI
+    return OpenAI(
+        api_key=OPENROUTER_API_KEY,
+        base_url="https://openrouter.ai/api/v1",
+    )
+
+
+def _stream_completion(client: "OpenAI", messages: list[dict]) -> str:
+    """
+    Request a completion as a stream and assemble the text. Tokens arrive
+    while the model is still generating, so a connection that dies mid-answer
+    fails right away instead of after the whole generation.
+    """
+    stream = client.chat.completions.create(
+        model=OPENROUTER_MODEL,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=8000,
+        stream=True,
+    )
+    parts = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+    return "".join(parts).strip()
+
+
+def _backoff_seconds(attempt: int, error: Exception | None = None) -> float:
+    """
+    Exponential backoff with full jitter, so parallel chunk calls that were
+    throttled together do not all retry at the same moment. A Retry-After
+    sent with the error is treated as a minimum.
+    """
+    wait = random.uniform(0, 2 ** (attempt + 1))
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            wait = max(wait, float(response.headers.get("retry-after", 0)))
+        except (TypeError, ValueError):
+            pass
+    return wait
 
 
 # ── Core API call ──────────────────────────────────────────────────────────────
@@ -504,6 +622,11 @@ def _call_llm(
     """
     Send a transcript (or chunk) to OpenRouter and parse the response.
 
+    Successful results are cached on disk by (model, prompts) for
+    LLM_CACHE_TTL seconds, so re-processing a video skips the API call.
+    An identical request already in flight (another job on the same video)
+    is waited on rather than sent again.
+
     Key decisions:
     - temperature=0.7: encourages the model to explore the transcript broadly
       and find less-obvious but more interesting clips. 0.2 produces lazy,
@@ -514,13 +637,7 @@ def _call_llm(
       JSON, which yields much better editorial decisions than being constrained
       from the first token.
     """
-    client = OpenAI(
-        api_key=OPENROUTER_API_KEY,
-        base_url="https://openrouter.ai/api/v1",
-    )
-
-    lang_instructions = _get_lang_instructions(subtitle_lang)
-    system_prompt = SYSTEM_PROMPT.format(lang_instructions=lang_instructions)
+    system_prompt = _get_system_prompt(subtitle_lang)
 
     chunk_info = ""
     if total_chunks > 1:
@@ -537,36 +654,62 @@ def _call_llm(
         f"\n\nTRANSCRIPT:\n{transcript_text}"
     )
 
+    cache_path = _llm_cache_path(system_prompt, user_prompt)
+    cached = _load_cached_clips(cache_path)
+    if cached:
+        print(f"  ✓ Using cached LLM response ({len(cached)} clips)")
+        return cached
+
+    # Concurrent jobs on the same video send identical prompts: let the
+    # first caller make the request and have the rest wait for its result.
+    with _inflight_lock:
+        future = _inflight.get(cache_path)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[cache_path] = future
+    if not is_leader:
+        print("  ⟳ Identical request already in flight, waiting for its result")
+        return future.result()
+
+    try:
+        clips = _request_clips(system_prompt, user_prompt, cache_path)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(clips)
+        return clips
+    finally:
+        with _inflight_lock:
+            _inflight.pop(cache_path, None)
+
+
+def _request_clips(system_prompt: str, user_prompt: str, cache_path: str) -> list[dict]:
+    """Call the API with retries and return normalized clips (cached on success)."""
+    client = _get_client()
+
     for attempt in range(MAX_RETRIES):
         try:
             print(f"  API attempt {attempt + 1}/{MAX_RETRIES}...")
 
-            response = client.chat.completions.create(
-                model=OPENROUTER_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user",   "content": user_prompt},
-                ],
-                temperature=0.7,
-                max_tokens=8000,
-            )
-
-            raw = response.choices[0].message.content.strip()
+            raw = _stream_completion(client, [
+                {"role": "system", "content": system_prompt},
+                {"role": "user",   "content": user_prompt},
+            ])
             print(f"  API response: {len(raw)} chars")
 
-            json_str = _extract_json(raw)
+            data = _extract_json(raw)
 
-            if not json_str:
+            if data is None:
                 try:
-                    json.loads(raw)
-                    json_str = raw
+                    data = json.loads(raw)
                 except json.JSONDecodeError:
                     raise json.JSONDecodeError(
                         "Could not extract valid JSON from response",
                         raw[:300], 0,
                     )
 
-            data = json.loads(json_str)
             clips = []
             if isinstance(data, dict):
                 clips = data.get("clips", [])
@@ -588,6 +731,7 @@ def _call_llm(
                     why_text  = raw_by_title.get(c["title"], {}).get("why_it_works", "")
                     why_log   = f" | {why_text[:80]}" if why_text else ""
                     print(f"    → \"{c['title']}\" ({seg_count} seg(s), {total_dur:.0f}s){why_log}")
+                _store_cached_clips(cache_path, normalized)
                 return normalized
 
             print("  ⚠ API returned valid JSON but no usable clips")
@@ -595,9 +739,9 @@ def _call_llm(
 
         except json.JSONDecodeError as e:
             if attempt < MAX_RETRIES - 1:
-                wait = 2 ** (attempt + 1)
+                wait = _backoff_seconds(attempt)
                 print(f"  ⟳ Invalid JSON (attempt {attempt + 1}): {str(e)[:100]}")
-                print(f"    Waiting {wait}s before retry...")
+                print(f"    Waiting {wait:.1f}s before retry...")
                 time.sleep(wait)
                 continue
             print(f"  ✗ Invalid JSON after {MAX_RETRIES} attempts")
@@ -608,9 +752,9 @@ def _call_llm(
 
         except Exception as e:
             if attempt < MAX_RETRIES - 1:
-                wait = 2 ** (attempt + 1)
+                wait = _backoff_seconds(attempt, e)
                 print(f"  ⟳ API error (attempt {attempt + 1}): {e}")
-                print(f"    Waiting {wait}s before retry...")
+                print(f"    Waiting {wait:.1f}s before retry...")
                 time.sleep(wait)
                 continue
             raise RuntimeError(f"API error after {MAX_RETRIES} attempts: {e}")
@@ -621,6 +765,7 @@ def _call_llm(
 def segment_transcript(
     formatted_text: str,
     subtitle_lang: str = "en",
+    max_workers: int = LLM_MAX_WORKERS,
 ):
     """
     Segment a formatted transcript into compiled shorts via OpenRouter.
@@ -630,7 +775,10 @@ def segment_transcript(
     anywhere in the video.
 
     For long videos (multiple chunks): processes each chunk independently,
-    targeting 3-5 clips per chunk, collecting all results.
+    targeting 3-5 clips per chunk, collecting all results. Chunks are sent
+    concurrently (up to `max_workers` at a time) and each chunk's clips are
+    yielded as soon as its response arrives. Chunks cover disjoint parts of
+    the video, so their arrival order does not affect overlap handling.
 
     Yields:
         dict: {title, hook, segments: [{start, end}, ...]}
@@ -650,12 +798,21 @@ def segment_transcript(
         return
 
     total_clips = 0
-    for i, chunk in enumerate(chunks):
-        print(f"  Processing chunk {i + 1}/{total}...")
-        clips = _call_llm(chunk, i, total, subtitle_lang=subtitle_lang)
-        print(f"  ✓ {len(clips)} clips from chunk {i + 1}")
-        for clip in clips:
-            total_clips += 1
-            yield clip
+    executor = ThreadPoolExecutor(max_workers=max(1, min(total, max_workers)))
+    try:
+        futures = {}
+        for i, chunk in enumerate(chunks):
+            print(f"  Processing chunk {i + 1}/{total}...")
+            futures[executor.submit(_call_llm, chunk, i, total, subtitle_lang=subtitle_lang)] = i
+
+        for future in as_completed(futures):
+            clips = future.result()
+            print(f"  ✓ {len(clips)} clips from chunk {futures[future] + 1}")
+            for clip in clips:
+                total_clips += 1
+                yield clip
+    finally:
+        # Also runs if the consumer stops early: drop chunks not yet started
+        executor.shutdown(wait=False, cancel_futures=True)
 
     print(f"  Total clips evaluated: {total_clips}")
@@ -31,7 +31,7 @@ let currentJobId = null;
 let pollInterval = null;
 
 // ── Step tracking ───────────────────────────────────
-const STEP_ORDER = ['downloading', 'parsing', 'review', 'analyzing', 'validating', 'cutting'];
+const STEP_ORDER = ['downloading', 'review', 'analyzing', 'validating', 'cutting'];
 
 function updateSteps(currentStatus) {
     const currentIdx = STEP_ORDER.indexOf(currentStatus);
@@ -1,4 +1,7 @@
 import os
+import json
+import hashlib
+import threading
 import traceback
 import whisper
 import torch
@@ -8,17 +11,31 @@ import torch
 # ---------------------------------------------------------------------------
 _whisper_models = {}
 _hinglish_pipeline = None
+# Flask serves requests on several threads; opening a few clips at once must
+# not load the same multi-GB model more than once.
+_model_lock = threading.Lock()
 
 
 def _get_whisper_model(model_size: str):
-    if model_size not in _whisper_models:
-        print(f"[Transcriber] Loading Whisper model: {model_size} ...")
-        _whisper_models[model_size] = whisper.load_model(model_size)
-        print(f"[Transcriber] Whisper '{model_size}' ready.")
-    return _whisper_models[model_size]
+    model = _whisper_models.get(model_size)
+    if model is not None:
+        return model
+    with _model_lock:
+        if model_size not in _whisper_models:
+            print(f"[Transcriber] Loading Whisper model: {model_size} ...")
+            _whisper_models[model_size] = whisper.load_model(model_size)
+            print(f"[Transcriber] Whisper '{model_size}' ready.")
+        return _whisper_models[model_size]
 
 
 def _get_hinglish_pipeline():
+    if _hinglish_pipeline is None:
+        with _model_lock:
+            _load_hinglish_pipeline()
+    return _hinglish_pipeline
+
+
+def _load_hinglish_pipeline():
     global _hinglish_pipeline
     if _hinglish_pipeline is None:
         from transformers import (
@@ -119,12 +136,9 @@ def _get_hinglish_pipeline():
         )
         print("[Transcriber] Hindi->Hinglish model ready.")
 
-    return _hinglish_pipeline
-
 
-def _detect_language(video_path: str) -> str:
+def _detect_language(audio) -> str:
     model = _get_whisper_model("base")
-    audio = whisper.load_audio(video_path)
     audio = whisper.pad_or_trim(audio)
     mel = whisper.log_mel_spectrogram(audio).to(model.device)
     _, probs = model.detect_language(mel)
@@ -232,18 +246,72 @@ def _normalise_hinglish_segments(result: dict, max_words: int = 6, max_duration:
     return segments
 
 
+# ---------------------------------------------------------------------------
+# On-disk result cache.
+# Transcription is by far the heaviest step, and the editor asks for the same
+# clip every time it is opened. Results are stored next to the clip, keyed on
+# the file identity (name, size, mtime) and model size, so a re-cut clip with
+# the same name is never served stale words.
+# ---------------------------------------------------------------------------
+_CACHE_DIRNAME = ".transcribe_cache"
+
+
+def _cache_path(video_path: str, model_size: str) -> str:
+    st = os.stat(video_path)
+    ident = f"{os.path.basename(video_path)}|{st.st_size}|{st.st_mtime_ns}|{model_size}"
+    key = hashlib.md5(ident.encode("utf-8")).hexdigest()
+    return os.path.join(os.path.dirname(video_path), _CACHE_DIRNAME, f"{key}.json")
+
+
+def _load_cached(cache_path: str) -> dict | None:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached(cache_path: str, result: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"[Transcriber] Could not write cache: {e}")
+
+
 def transcribe_video(video_path: str, model_size: str = "medium") -> dict:
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
-    lang = _detect_language(video_path)
+    cache_path = _cache_path(video_path, model_size)
+    cached = _load_cached(cache_path)
+    if cached is not None:
+        print(f"[Transcriber] Cache hit for {os.path.basename(video_path)}")
+        return cached
+
+    result = _transcribe_uncached(video_path, model_size)
+    _store_cached(cache_path, result)
+    return result
+
+
+def _transcribe_uncached(video_path: str, model_size: str) -> dict:
+    # Decode the clip to 16 kHz mono once; language detection and both
+    # transcription paths all work from this array instead of re-running ffmpeg.
+    audio = whisper.load_audio(video_path)
+    lang = _detect_language(audio)
 
     if lang == "hi":
         print("[Transcriber] Hindi detected — routing to Hinglish model.")
         try:
             pipe = _get_hinglish_pipeline()
             print("[Transcriber] Running inference...")
-            raw_result = pipe(video_path, return_timestamps="word")
+            raw_result = pipe(
+                {"raw": audio, "sampling_rate": whisper.audio.SAMPLE_RATE},
+                return_timestamps="word",
+            )
             print(f"[Transcriber] Inference done. Text preview: {str(raw_result.get('text',''))[:200]}")
             segments = _normalise_hinglish_segments(raw_result)
             return {"segments": segments, "language": "hi"}
@@ -255,5 +323,5 @@ def transcribe_video(video_path: str, model_size: str = "medium") -> dict:
     else:
         print(f"[Transcriber] Language '{lang}' — using standard Whisper '{model_size}'.")
         model = _get_whisper_model(model_size)
-        result = model.transcribe(video_path, word_timestamps=True)
+        result = model.transcribe(audio, word_timestamps=True)
         return {"segments": result["segments"], "language": result["language"]}
@@ -1,12 +1,25 @@
 import re
 
+# Bracketed caption noise: [Music], [Applause], [Laughter], ...
+_NOISE_RE = re.compile(r"\[.*?\]")
+# Blank line(s) between SRT cues
+_BLOCK_SPLIT_RE = re.compile(r"\n\s*\n")
+# SRT cue timing line: "00:01:02,345 --> 00:01:04,567", plus any trailing
+# position settings, matched on whichever line of the cue it sits
+_TS_RE = re.compile(
+    r"^[ \t]*(\d{2}:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2}[,.]\d{3})[^\n]*",
+    re.MULTILINE,
+)
+
 
 def _ts_to_seconds(ts: str) -> float:
-    """Convert SRT timestamp (HH:MM:SS,mmm) to float seconds."""
-    ts = ts.strip().replace(",", ".")
-    parts = ts.split(":")
-    h, m, s = float(parts[0]), float(parts[1]), float(parts[2])
-    return h * 3600 + m * 60 + s
+    """
+    Convert SRT timestamp (HH:MM:SS,mmm) to float seconds.
+    The fields sit at fixed offsets (guaranteed by _TS_RE), so they are
+    sliced directly; the separator before the millis may be ',' or '.'.
+    """
+    millis = int(ts[0:2]) * 3600000 + int(ts[3:5]) * 60000 + int(ts[6:8]) * 1000 + int(ts[9:12])
+    return millis / 1000
 
 
 def _seconds_to_mmss(seconds: float) -> str:
@@ -26,36 +39,21 @@ def parse_srt(srt_path: str) -> list[dict]:
     with open(srt_path, "r", encoding="utf-8", errors="ignore") as f:
         content = f.read()
 
-    # Split into blocks by double newline
-    blocks = re.split(r"\n\s*\n", content.strip())
+    # Split into blocks by double newline. Each block needs one regex search
+    # for its timing line; the cue text is everything after that line.
     segments = []
-
-    for block in blocks:
-        lines = block.strip().split("\n")
-        if len(lines) < 2:
+    for block in _BLOCK_SPLIT_RE.split(content.strip()):
+        ts_match = _TS_RE.search(block)
+        if not ts_match:
             continue
 
-        # Find the timestamp line (could be line 1 or line 0)
-        ts_match = None
-        text_start_idx = 0
-        for i, line in enumerate(lines):
-            ts_match = re.match(
-                r"(\d{2}:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2}[,.]\d{3})",
-                line.strip(),
-            )
-            if ts_match:
-                text_start_idx = i + 1
-                break
-
-        if not ts_match or text_start_idx >= len(lines):
-            continue
-
-        start = _ts_to_seconds(ts_match.group(1))
-        end = _ts_to_seconds(ts_match.group(2))
-        text = " ".join(lines[text_start_idx:]).strip()
-
+        text = " ".join(block[ts_match.end():].split())
         if text:
-            segments.append({"start": start, "end": end, "text": text})
+            segments.append({
+                "start": _ts_to_seconds(ts_match.group(1)),
+                "end": _ts_to_seconds(ts_match.group(2)),
+                "text": text,
+            })
 
     return segments
 
@@ -69,21 +67,18 @@ def clean_transcript(segments: list[dict]) -> list[dict]:
     - Normalizes whitespace
     - Skips very short or empty segments
     """
-    noise_patterns = re.compile(r"\[.*?\]", re.IGNORECASE)
-
     cleaned = []
     seen_texts = set()
 
     for seg in segments:
-        text = noise_patterns.sub("", seg["text"]).strip()
-        text = re.sub(r"\s+", " ", text)  # normalize whitespace
-        text = text.strip()
+        # split() + join collapses whitespace runs and trims both ends
+        text = " ".join(_NOISE_RE.sub("", seg["text"]).split())
 
-        if not text or len(text) < 3:
+        if len(text) < 3:
             continue
 
         # Auto-generated subs heavily duplicate: skip exact duplicates
-        text_key = text.lower().strip()
+        text_key = text.lower()
         if text_key in seen_texts:
             continue
         seen_texts.add(text_key)
@@ -125,7 +120,8 @@ def merge_segments(segments: list[dict], min_length: int = 50) -> list[dict]:
             deduped.append(seg.copy())
 
     # Step 2: Merge short segments for complete thoughts
-    merged = [deduped[0].copy()]
+    # deduped already holds private copies, so they can be extended in place
+    merged = [deduped[0]]
 
     for seg in deduped[1:]:
         prev = merged[-1]
@@ -135,7 +131,7 @@ def merge_segments(segments: list[dict], min_length: int = 50) -> list[dict]:
             prev["text"] = prev["text"] + " " + seg["text"]
             prev["end"] = seg["end"]
         else:
-            merged.append(seg.copy())
+            merged.append(seg)
 
     # Handle last segment if it's too short
     if len(merged) > 1 and len(merged[-1]["text"]) < 20:
@@ -1,6 +1,48 @@
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
 from config import MIN_CLIP_DURATION, MAX_CLIP_DURATION
 
 
+class RangeSet:
+    """
+    Time ranges already claimed by accepted clips. Kept as sorted, merged
+    start/end lists so an overlap check is one bisect instead of a scan
+    over every accepted segment.
+    """
+
+    def __init__(self):
+        self._starts: list[float] = []
+        self._ends: list[float] = []
+
+    def overlaps(self, start: float, end: float) -> bool:
+        """True if (start, end) overlaps any claimed range."""
+        # Ranges are disjoint, so the last one starting before `end` also
+        # has the largest end among them
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._ends[i - 1] > start
+
+    def add(self, start: float, end: float) -> None:
+        """Claim (start, end), merging it with ranges it touches or overlaps."""
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def claim_clip(self, clip: dict) -> bool:
+        """
+        Claim all of a clip's segments unless any of them overlaps an
+        existing range. Returns whether the clip was claimed.
+        """
+        if any(self.overlaps(seg["start"], seg["end"]) for seg in clip["segments"]):
+            return False
+        for seg in clip["segments"]:
+            self.add(seg["start"], seg["end"])
+        return True
+
+
 def validate_clips(
     clips: list[dict],
     video_duration: float,
@@ -28,20 +70,27 @@ def validate_clips(
     Returns:
         list of valid clips, sorted by first segment's start time
     """
+    # Every segment must lie in one window: not before 0 or the transcript
+    # start (2s tolerance), not after the video end (1s tolerance) or the
+    # transcript end (2s tolerance)
+    min_start = max(0, transcript_start - 2)
+    max_end = min(video_duration + 1, transcript_end + 2)
+
     valid = []
 
     for clip in clips:
-        # Check required fields
-        if "segments" not in clip or not isinstance(clip["segments"], list):
-            continue
-        if not clip["segments"]:
+        # Check required fields (one lookup; missing, empty or non-list)
+        segments = clip.get("segments")
+        if not segments or not isinstance(segments, list):
             continue
 
-        # Validate each segment
+        # Validate each segment, keeping plain (start, end) tuples and the
+        # running duration; dicts are only built for clips that pass
         valid_segments = []
+        total_duration = 0.0
         skip_clip = False
 
-        for seg in clip["segments"]:
+        for seg in segments:
             try:
                 start = float(seg["start"])
                 end = float(seg["end"])
@@ -49,42 +98,26 @@ def validate_clips(
                 skip_clip = True
                 break
 
-            # Basic sanity
-            if start < 0 or end < 0 or start >= end:
+            # Inside the window and at least 5 seconds (so never reversed)
+            if start < min_start or end > max_end or end - start < 5:
                 skip_clip = True
                 break
 
-            # Each segment should be at least 5 seconds
-            if end - start < 5:
-                skip_clip = True
-                break
-
-            # Within video duration (1s tolerance)
-            if end > video_duration + 1:
-                skip_clip = True
-                break
-
-            # Within transcript range (2s tolerance)
-            if start < transcript_start - 2 or end > transcript_end + 2:
-                skip_clip = True
-                break
-
-            valid_segments.append({
-                "start": round(start, 2),
-                "end": round(end, 2),
-            })
+            start, end = round(start, 2), round(end, 2)
+            total_duration += end - start
+            valid_segments.append((start, end))
 
         if skip_clip or not valid_segments:
             continue
 
-        # Sort segments by start time within the clip
-        valid_segments.sort(key=lambda s: s["start"])
-
         # Total duration check
-        total_duration = sum(s["end"] - s["start"] for s in valid_segments)
         if total_duration < MIN_CLIP_DURATION or total_duration > MAX_CLIP_DURATION:
             continue
 
+        # Sort segments by start time within the clip
+        valid_segments.sort(key=itemgetter(0))
+        valid_segments = [{"start": start, "end": end} for start, end in valid_segments]
+
         valid.append({
             "title": str(clip.get("title", "Untitled")),
             "hook": str(clip.get("hook", "")),
@@ -96,25 +129,8 @@ def validate_clips(
         })
 
     # Sort clips by first segment's start time
-    valid.sort(key=lambda c: c["start"])
+    valid.sort(key=itemgetter("start"))
 
     # Remove clips that have overlapping segments with previous clips
-    non_overlapping = []
-    used_ranges = []  # list of (start, end) tuples from all accepted clips
-
-    for clip in valid:
-        overlaps = False
-        for seg in clip["segments"]:
-            for used_start, used_end in used_ranges:
-                if seg["start"] < used_end and seg["end"] > used_start:
-                    overlaps = True
-                    break
-            if overlaps:
-                break
-
-        if not overlaps:
-            non_overlapping.append(clip)
-            for seg in clip["segments"]:
-                used_ranges.append((seg["start"], seg["end"]))
-
-    return non_overlapping
+    used = RangeSet()
+    return [clip for clip in valid if used.claim_clip(clip)]
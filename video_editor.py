@@ -2,6 +2,13 @@ import ffmpeg
 import os
 import re
 
+# Punctuation that ends a phrase-mode subtitle chunk
+_PHRASE_BREAK_RE = re.compile(r'[.?!,;:]')
+
+# Subtitle text -> ASS event text in one pass: hard line breaks become \N and
+# braces are escaped so libass does not read them as override tags
+_ASS_TEXT_ESCAPE = str.maketrans({'\n': '\\N', '{': '\\{', '}': '\\}'})
+
 def build_subtitle_entries(segments, style_config):
     """
     Build subtitle entries based on display mode.
@@ -71,7 +78,7 @@ def build_subtitle_entries(segments, style_config):
                 current_chunk.append(word_text)
                 
                 # Break conditions
-                has_punctuation = bool(re.search(r'[.?!,;:]', word_text))
+                has_punctuation = bool(_PHRASE_BREAK_RE.search(word_text))
                 should_break = len(current_chunk) >= words_per_line or (has_punctuation and len(current_chunk) > 1)
                 is_last = i == len(words) - 1
                 
@@ -205,8 +212,6 @@ Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour,
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
     
-    events = []
-    
     def format_time_ass(seconds):
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
@@ -214,15 +219,18 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         centis = int((seconds - int(seconds)) * 100)
         return f"{hours}:{minutes:02}:{secs:02}.{centis:02}"
 
-    # Use pre-built entries directly
-    for entry in entries:
+    def format_event(entry):
         start = format_time_ass(entry['start'])
         end = format_time_ass(entry['end'])
-        text = entry['text'].replace('\n', '\\N')
-        events.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}")
+        text = entry['text'].translate(_ASS_TEXT_ESCAPE)
+        return f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}"
+
+    # Use pre-built entries directly, formatted straight into the join
+    events = "\n".join(format_event(entry) for entry in entries)
 
     with open(output_path, "w", encoding="utf-8") as f:
-        f.write(header + "\n".join(events))
+        f.write(header)
+        f.write(events)
         
     return output_path
 